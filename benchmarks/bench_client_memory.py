@@ -0,0 +1,118 @@
+import os
+import sys
+import gc
+import json
+import asyncio
+import resource
+import tracemalloc
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import discord
+
+from startup import client_options, message_handle
+
+BOT_ID = 900000000000000000
+CHANNELS_PER_GUILD = 25
+ROLES_PER_GUILD = 20
+EMOJIS_PER_GUILD = 40
+VOICE_MEMBERS_PER_GUILD = 5
+MESSAGES_PER_GUILD = 30
+
+
+def user_payload(user_id):
+    return {"id": str(user_id), "username": f"membre{user_id}", "discriminator": "0", "global_name": f"Membre {user_id}", "avatar": "a" * 32}
+
+
+def member_payload(user_id, roles):
+    return {"user": user_payload(user_id), "roles": roles, "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+
+
+# GUILD_CREATE tel qu'envoyé par la gateway avec les intents par défaut (sans members ni presences)
+def guild_payload(index):
+    guild_id = 100000000000000000 + index * 1000
+    roles = [{"id": str(guild_id + r), "name": f"role{r}", "permissions": "0", "position": r, "color": 0, "hoist": False,
+              "managed": False, "mentionable": True} for r in range(ROLES_PER_GUILD)]
+    voice_ids = [500000000000000000 + index * 100 + v for v in range(VOICE_MEMBERS_PER_GUILD)]
+    return {
+        "id": str(guild_id), "name": f"Serveur {index}", "owner_id": str(voice_ids[0]), "member_count": 500, "large": False,
+        "roles": roles, "features": [], "premium_tier": 0,
+        "channels": [{"id": str(guild_id + 100 + c), "type": 0 if c % 5 else 2, "name": f"salon-{c}", "position": c, "bitrate": 64000, "user_limit": 0,
+                      "permission_overwrites": [{"id": str(guild_id), "type": 0, "allow": "0", "deny": "1024"}]} for c in range(CHANNELS_PER_GUILD)],
+        "emojis": [{"id": str(guild_id + 200 + e), "name": f"emote{e}", "roles": [], "require_colons": True, "managed": False,
+                    "animated": False, "available": True} for e in range(EMOJIS_PER_GUILD)],
+        "stickers": [],
+        "members": [member_payload(BOT_ID, [])] + [member_payload(u, [roles[1]["id"]]) for u in voice_ids],
+        "voice_states": [{"user_id": str(u), "channel_id": str(guild_id + 100), "session_id": "s", "deaf": False, "mute": False,
+                          "self_deaf": False, "self_mute": False, "self_video": False, "suppress": False} for u in voice_ids],
+        "threads": [], "stage_instances": [], "guild_scheduled_events": [],
+    }
+
+
+def message_payload(guild, index):
+    guild_id = int(guild["id"])
+    author_id = 600000000000000000 + index
+    return {
+        "id": str(700000000000000000 + guild_id // 1000 * 100 + index), "channel_id": str(guild_id + 101), "guild_id": str(guild_id),
+        "author": user_payload(author_id), "member": {k: v for k, v in member_payload(author_id, []).items() if k != "user"},
+        "content": "gg ! quelqu'un pour une flex ?", "timestamp": "2025-01-15T18:02:11+00:00", "edited_timestamp": None,
+        "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "pinned": False, "type": 0,
+        "embeds": [{"title": "🔴 Kamet0 est en live !", "description": "SOLOQ CHALLENGER • !sub !discord", "color": 0x9146ff,
+                    "fields": [{"name": "👥 Viewers", "value": "**12k** spectateurs", "inline": True}],
+                    "image": {"url": "https://static-cdn.jtvnw.net/previews-ttv/live_user_kamet0-1280x720.jpg"}}],
+    }
+
+
+def measure(lean, guilds):
+    client = discord.Client(**client_options(lean=lean))
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data=user_payload(BOT_ID))
+    payloads = [guild_payload(i) for i in range(guilds)]
+    messages = [[message_payload(g, m) for m in range(MESSAGES_PER_GUILD)] for g in payloads]
+
+    gc.collect()
+    tracemalloc.start()
+    for data in payloads:
+        state._add_guild_from_data(data)
+    # Trafic de salon reçu par la gateway, puis une notification live conservée par serveur (live_games, event_messages)
+    retained = []
+    for guild_messages in messages:
+        for data in guild_messages:
+            state.parse_message_create(data)
+        message = state._get_message(int(guild_messages[-1]["id"])) or discord.Message(
+            state=state, channel=client.get_channel(int(guild_messages[-1]["channel_id"])), data=guild_messages[-1])
+        retained.append(message_handle(message) if lean else message)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "guilds": len(client.guilds),
+        "members": sum(len(g._members) for g in client.guilds),
+        "emojis": len(state._emojis),
+        "messages": len(state._messages or ()),
+        "mb": current / 1e6,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+async def run(lean, guilds):
+    print(json.dumps(measure(lean, guilds)))
+
+
+if __name__ == '__main__':
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    if len(sys.argv) > 2:
+        asyncio.run(run(sys.argv[2] == "lean", guilds))
+        sys.exit(0)
+
+    # Chaque mode dans un processus séparé pour que le RSS de l'un ne pollue pas l'autre
+    results = {}
+    for mode in ("defaut", "lean"):
+        output = subprocess.run([sys.executable, __file__, str(guilds), mode], capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    print(f"Client Discord avec {guilds} serveurs ({MESSAGES_PER_GUILD} messages reçus par serveur)")
+    print(f"{'mode':<10}{'membres':>9}{'emojis':>8}{'messages':>10}{'alloué':>10}{'RSS max':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['members']:>9}{r['emojis']:>8}{r['messages']:>10}{r['mb']:>8.1f}Mo{r['rss_mb']:>8.1f}Mo")
+    print(f"Gain du mode lean: {1 - results['lean']['mb'] / results['defaut']['mb']:.0%} de mémoire allouée")
@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import codec
+
+random.seed(0)
+
+
+# Charges utiles à la forme des réponses Riot/Twitch (match-v5, spectator-v5, helix/streams)
+def match_payload():
+    participant_keys = [f"stat{i}" for i in range(120)]
+    return {
+        "metadata": {"matchId": "EUW1_7000000000", "participants": [f"puuid-{i:02d}-" + "x" * 66 for i in range(10)]},
+        "info": {
+            "gameCreation": 1736960531000, "gameDuration": 1834, "queueId": 420, "gameVersion": "15.1.650.1234",
+            "participants": [
+                dict({k: random.randint(0, 40000) for k in participant_keys},
+                     puuid=f"puuid-{i:02d}-" + "x" * 66, championName="Ahri", teamId=100 if i < 5 else 200,
+                     win=i < 5, riotIdGameName=f"Joueur{i}", riotIdTagline="EUW",
+                     challenges={f"c{j}": random.random() * 100 for j in range(110)})
+                for i in range(10)
+            ],
+            "teams": [{"teamId": t, "win": t == 100, "objectives": {"baron": {"first": True, "kills": 1}}} for t in (100, 200)],
+        },
+    }
+
+
+def spectator_payload():
+    return {
+        "gameId": 7000000001, "gameQueueConfigId": 420, "gameLength": 312, "platformId": "EUW1", "gameMode": "CLASSIC",
+        "participants": [
+            {"puuid": f"puuid-{i:02d}-" + "x" * 66, "teamId": 100 if i < 5 else 200, "championId": random.randint(1, 950),
+             "spell1Id": 4, "spell2Id": 14, "riotId": f"Joueur{i}#EUW", "bot": False,
+             "perks": {"perkIds": [random.randint(8000, 9000) for _ in range(9)], "perkStyle": 8100, "perkSubStyle": 8300},
+             "gameCustomizationObjects": []}
+            for i in range(10)
+        ],
+        "bannedChampions": [{"championId": random.randint(1, 950), "teamId": 100, "pickTurn": i} for i in range(10)],
+    }
+
+
+def streams_payload():
+    return {"data": [
+        {"id": str(40000000000 + i), "user_id": str(10000 + i), "user_login": f"streamer{i}", "user_name": f"Streamer{i}",
+         "game_id": "21779", "game_name": "League of Legends", "type": "live", "title": "SOLOQ • !sub !discord 🔥",
+         "viewer_count": random.randint(10, 50000), "started_at": "2025-01-15T18:02:11Z", "language": "fr",
+         "thumbnail_url": f"https://static-cdn.jtvnw.net/previews-ttv/live_user_streamer{i}-{{width}}x{{height}}.jpg",
+         "tags": ["Français", "LoL"], "is_mature": False}
+        for i in range(100)
+    ], "pagination": {}}
+
+
+PAYLOADS = [("match-v5", match_payload()), ("spectator-v5", spectator_payload()), ("helix/streams x100", streams_payload())]
+
+
+def stdlib_loads(data):
+    return json.loads(data)
+
+
+def stdlib_dumps(obj):
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"Codec actif: {codec.BACKEND}")
+    print(f"{'payload':<20}{'taille':>9}{'loads json':>12}{'loads codec':>13}{'dumps json(indent)':>20}{'dumps codec':>13}{'taille codec':>14}")
+    for name, payload in PAYLOADS:
+        raw = json.dumps(payload).encode('utf-8')
+        timings = []
+        for func, arg in ((stdlib_loads, raw), (codec.loads, raw), (stdlib_dumps, payload), (codec.dumps, payload)):
+            timings.append(min(timeit.repeat(lambda: func(arg), number=number, repeat=3)) / number)
+        # Débit en Mo/s rapporté à la taille de la charge utile
+        mbps = [len(raw) / t / 1e6 for t in timings]
+        print(f"{name:<20}{len(raw) / 1024:>7.1f}Ko{mbps[0]:>9.0f}Mo/s{mbps[1]:>9.0f}Mo/s{mbps[2]:>16.0f}Mo/s{mbps[3]:>9.0f}Mo/s"
+              f"{len(codec.dumps(payload)) / len(stdlib_dumps(payload)):>13.0%}")
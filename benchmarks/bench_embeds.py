@@ -0,0 +1,138 @@
+import os
+import sys
+import random
+import timeit
+import itertools
+from datetime import datetime
+
+import discord
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from embeds import stream_embed, create_event_embed, create_notification_embed, render_teams, live_game_embed
+
+STREAM = {
+    "user_login": "kamet0",
+    "user_name": "Kamet0",
+    "title": "SOLOQ CHALLENGER • !sub !discord",
+    "game_name": "League of Legends",
+    "viewer_count": 12543,
+    "started_at": "2025-01-15T18:02:11Z",
+    "thumbnail_url": "https://static-cdn.jtvnw.net/previews-ttv/live_user_kamet0-{width}x{height}.jpg",
+}
+CHAMPIONS = {str(k): {"key": str(k), "id": f"Champ{k}", "name": f"Champion {k}"} for k in range(1, 171)}
+# Une composition différente à chaque appel, plus nombreuses que le cache de render_teams (512): aucun hit
+# lru_cache dans la boucle chronométrée, comme pour des parties distinctes
+ROSTERS = [
+    [{"championId": champion_id, "teamId": 100 if i < 5 else 200, "puuid": f"p{i}"}
+     for i, champion_id in enumerate(random.Random(seed).sample(range(1, 171), 10))]
+    for seed in range(2048)
+]
+next_roster = itertools.cycle(ROSTERS).__next__
+
+
+class Event:
+    id = 1
+    name = "Finale LEC"
+    date = datetime(2025, 4, 12, 18, 0)
+    created_at = datetime(2025, 4, 1, 12, 0)
+    creator = "Alpine"
+    category = "lec"
+    stream = "https://twitch.tv/otplol_"
+    lieu = "Berlin"
+    image = "https://example.com/lec.png"
+    description = "G2 vs FNC"
+
+
+# Implémentations d'origine (main.py avant la couche de templates), gardées comme référence
+def legacy_format_date(date):
+    months = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
+    days = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+    return f"{days[date.weekday()]} {date.day} {months[date.month - 1]} {date.year} à {date.strftime('%H:%M')}"
+
+
+def legacy_stream_embed(stream, username):
+    embed = discord.Embed(title=f"🔴 {stream['user_name']} est en live !", description=stream['title'], url=f"https://twitch.tv/{username}", color=0x9146ff)
+    viewer_count = stream.get('viewer_count', 0)
+    embed.add_field(name="👥 Viewers", value=f"**{viewer_count//1000}k** spectateurs", inline=True)
+    if stream.get('game_name'):
+        embed.add_field(name="🎮 Jeu", value=stream['game_name'], inline=True)
+    thumbnail_url = stream.get('thumbnail_url', '').replace('{width}', '1280').replace('{height}', '720')
+    if thumbnail_url:
+        embed.set_image(url=thumbnail_url)
+    embed.set_footer(text="Stream commencé à 19:02 • Mise à jour toutes les 2 min")
+    return embed
+
+
+def legacy_event_embed(event):
+    embed = discord.Embed(title=f"🎉 {event.name}", timestamp=event.created_at, color=0x00AE86)
+    embed.add_field(name="📅 Date", value=legacy_format_date(event.date), inline=True)
+    category_names = {'lec': '🏆 LEC', 'lfl': '🇫🇷 LFL', 'rl': '🚗 Rocket League', 'r6': '🎯 Rainbow Six', 'chess': '♟️ Échecs'}
+    embed.add_field(name="🎮 Catégorie", value=category_names.get(event.category, f"🎮 {event.category.upper()}"), inline=True)
+    embed.add_field(name="📍 Lieu", value=event.lieu, inline=True)
+    embed.add_field(name="📺 Stream", value=event.stream, inline=False)
+    embed.add_field(name="📝 Description", value=event.description, inline=False)
+    embed.set_image(url=event.image)
+    embed.set_footer(text=f"Créé par {event.creator}")
+    return embed
+
+
+def legacy_notification_embed(event, minutes_before):
+    embed = discord.Embed(title=f"⏰ {event.name} - Dans {minutes_before} minutes", description=f"L'événement commence dans {minutes_before} minutes !", color=0xFFA500, timestamp=datetime.now())
+    embed.add_field(name="📅 Heure de début", value=legacy_format_date(event.date), inline=True)
+    category_names = {'lec': '🏆 LEC', 'lfl': '🇫🇷 LFL', 'rl': '🚗 Rocket League', 'r6': '🎯 Rainbow Six', 'chess': '♟️ Échecs'}
+    embed.add_field(name="🎮 Catégorie", value=category_names.get(event.category, event.category.upper()), inline=True)
+    embed.add_field(name="📍 Lieu", value=event.lieu, inline=True)
+    embed.add_field(name="📺 Stream", value=event.stream, inline=False)
+    embed.set_image(url=event.image)
+    return embed
+
+
+def legacy_find_champion(champion_id):
+    for champion_info in CHAMPIONS.values():
+        if int(champion_info.get("key", 0)) == champion_id:
+            return {"name": champion_info["name"]}
+    return {"name": f"Champion #{champion_id}"}
+
+
+def legacy_live_game_embed():
+    embed = discord.Embed(title="PARTIE DÉTECTÉE !", color=0x00ff41, timestamp=datetime.now())
+    embed.description = "**Caps#EUW** joue **Champion 17** en **Ranked Solo**"
+    embed.add_field(name="Infos", value="\n".join(["Durée: 3 min", "Région: EUW", "Mode: Ranked Solo"]), inline=True)
+    blue, red = [], []
+    for p in next_roster():
+        marker = " ⭐" if p["puuid"] == "p0" else ""
+        (blue if p["teamId"] == 100 else red).append(f"**{legacy_find_champion(p['championId'])['name']}**{marker}")
+    embed.add_field(name="Équipes", value=f"🔴 {' • '.join(red)}\n\n⚡ **VS** ⚡\n\n🔵 {' • '.join(blue)}", inline=False)
+    embed.set_footer(text="GL HF ! • Message supprimé dans 25 min")
+    return embed
+
+
+CHAMPION_BY_KEY = {int(c["key"]): c for c in CHAMPIONS.values()}
+
+
+def templated_live_game_embed():
+    red, blue = [], []
+    for p in next_roster():
+        name = CHAMPION_BY_KEY[p["championId"]]["name"] if p["championId"] in CHAMPION_BY_KEY else f"Champion #{p['championId']}"
+        (blue if p["teamId"] == 100 else red).append((name, p["puuid"] == "p0", None))
+    return live_game_embed("Caps#EUW", "Champion 17", "Ranked Solo", 3, "EUW", render_teams(tuple(red), tuple(blue)))
+
+
+CASES = [
+    ("stream", lambda: legacy_stream_embed(STREAM, "kamet0"), lambda: stream_embed(STREAM, "kamet0", "Stream commencé à 19:02 • Mise à jour toutes les 2 min")),
+    ("event", lambda: legacy_event_embed(Event), lambda: create_event_embed(Event, detailed=True)),
+    ("notification", lambda: legacy_notification_embed(Event, 15), lambda: create_notification_embed(Event, 15, datetime.now())),
+    ("live_game", legacy_live_game_embed, templated_live_game_embed),
+]
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'embed':<14}{'avant (µs)':>12}{'après (µs)':>12}{'gain':>8}")
+    for name, before, after in CASES:
+        t_before = min(timeit.repeat(before, number=number, repeat=3)) / number * 1e6
+        t_after = min(timeit.repeat(after, number=number, repeat=3)) / number * 1e6
+        print(f"{name:<14}{t_before:>12.2f}{t_after:>12.2f}{t_before / t_after:>7.2f}x")
+    # stream n'a aucune table à hoister: le template ne fait qu'ajouter un appel, l'écart (~1.0x) reste dans le bruit
+    print("stream: pas de gain attendu (écart dans le bruit); live_game: table CHAMPION_BY_KEY, sans cache de rendu")
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import codec
+from snapshot import encode_snapshot, write_snapshot, read_snapshot
+
+random.seed(0)
+
+
+# État à la forme de collect_state() dans main.py, réparti sur les différents types d'entrées
+def build_state(records):
+    players, streams, messages, event_count = records // 2, records // 5, records // 5, records // 10
+    return {
+        "saved_at": time.time(),
+        "streamers": {1000 + c: [50000 + c * 100 + i for i in range(100)] for c in range(streams // 100)},
+        "stream_messages": {f"{1000 + i % 500}_{50000 + i}": {"message_id": 1300000000000000000 + i, "last_update": time.time()} for i in range(messages)},
+        "ping_roles": {1000 + c: 2000 + c for c in range(500)},
+        "watched_players": {
+            100000 + u: [{"gamename": f"Joueur{u}_{i}#EUW", "puuid": f"puuid-{u}-{i}-" + "x" * 60, "region": "euw1",
+                          "channel_id": 1000 + u % 500, "last_status": random.random() < 0.1, "ping_role_id": None,
+                          "stream_url": None} for i in range(5)]
+            for u in range(players // 5)
+        },
+        "event_id_counter": event_count + 1,
+        "events": {
+            eid: {"id": eid, "name": f"Tournoi {eid}", "date": "2026-10-19T21:00:00+02:00", "creator": "Orga",
+                  "guild_id": 4000 + eid % 50, "channel_id": 1000 + eid % 500, "role_id": None, "category": "lol",
+                  "stream": None, "lieu": None, "image": None, "description": "Soirée clash",
+                  "created_at": "2026-10-18T12:00:00+02:00"}
+            for eid in range(1, event_count + 1)
+        },
+        "notifications_sent": {eid: {"15min": False, "live": False} for eid in range(1, event_count + 1)},
+        "event_messages": {eid: (1000 + eid % 500, 1400000000000000000 + eid) for eid in range(1, event_count + 1)},
+    }
+
+
+def measure(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"  {label:<28}{(time.perf_counter() - started) * 1000:>8.1f}ms")
+    return result
+
+
+if __name__ == '__main__':
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    state = build_state(records)
+    print(f"Snapshot de {records} enregistrements")
+    with tempfile.TemporaryDirectory() as directory:
+        snap_path = os.path.join(directory, 'state.snap')
+        json_path = os.path.join(directory, 'state.json')
+
+        data = measure("encodage snapshot", lambda: encode_snapshot(state, clean=True))
+        measure("écriture snapshot", lambda: write_snapshot(snap_path, data))
+        restored, clean = measure("lecture snapshot (mmap)", lambda: read_snapshot(snap_path))
+        assert clean and restored == state
+
+        # Référence: le même état via les fichiers JSON utilisés par les autres backends
+        measure(f"écriture JSON ({codec.BACKEND})", lambda: codec.dump_file(state, json_path))
+        measure(f"lecture JSON ({codec.BACKEND})", lambda: codec.load_file(json_path))
+        print(f"  taille snapshot {os.path.getsize(snap_path) / 1e6:.1f}Mo, JSON {os.path.getsize(json_path) / 1e6:.1f}Mo")
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def profile_import(module, env=None):
+    code = f"import sys; sys.path.insert(0, {os.path.abspath(ROOT)!r}); import {module}"
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": depth}
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil du temps d'import (-X importtime) de main.py")
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', help="Écrire le résultat dans ce fichier JSON")
+    args = parser.parse_args()
+
+    env = {k: v for k, v in os.environ.items() if k != 'DATABASE_URL'}
+    runs = [profile_import(args.module, env) for _ in range(args.runs)]
+
+    total = statistics.median(r[args.module]["cumulative_us"] for r in runs)
+    last = runs[-1]
+    direct = sorted(
+        ((name, info) for name, info in last.items() if info["depth"] == 1),
+        key=lambda item: item[1]["cumulative_us"], reverse=True
+    )[:args.top]
+
+    print(f"Import de {args.module}: {total / 1000:.1f} ms (médiane sur {args.runs} runs)")
+    print(f"{'module':<32}{'cumulé (ms)':>12}")
+    for name, info in direct:
+        print(f"{name:<32}{info['cumulative_us'] / 1000:>12.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "module": args.module,
+                "python": sys.version.split()[0],
+                "runs": args.runs,
+                "median_ms": round(total / 1000, 1),
+                "top_imports_ms": {name: round(info["cumulative_us"] / 1000, 1) for name, info in direct},
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+parser = argparse.ArgumentParser(description="Charge Riot/Twitch rejouée depuis une capture (TRAFFIC_RECORD)")
+parser.add_argument('capture')
+parser.add_argument('--speed', type=float, default=10.0, help="accélération du rythme et des latences d'origine")
+parser.add_argument('--port', type=int, default=8780)
+args = parser.parse_args()
+
+# Les clients lisent TRAFFIC_REPLAY_URL à l'import: à positionner avant de les charger
+os.environ["TRAFFIC_REPLAY_URL"] = f"http://127.0.0.1:{args.port}"
+os.environ.pop("TRAFFIC_RECORD", None)
+
+import traffic
+from riot_api import RiotAPI
+from twitch_api import TwitchAPI
+
+
+def percentile(values, ratio):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))] if values else 0.0
+
+
+async def replay_one(riot, twitch, entry, latencies):
+    started = time.perf_counter()
+    parts = urllib.parse.urlsplit(entry["url"])
+    if parts.hostname == "api.twitch.tv" and parts.path == "/helix/streams":
+        # Passe par le vrai client Twitch (découpage par 100) comme check_streams
+        await twitch.get_streams([v for k, v in urllib.parse.parse_qsl(parts.query) if k == "user_id"])
+    elif parts.hostname.endswith("api.riotgames.com"):
+        await riot.request(entry["url"])
+    else:
+        return
+    latencies.setdefault(parts.hostname, []).append((time.perf_counter() - started) * 1000)
+
+
+async def main():
+    entries = sorted(traffic.load_capture(args.capture), key=lambda e: e["t"])
+    server = traffic.ReplayServer(entries, args.speed)
+    await server.start(port=args.port)
+
+    riot = RiotAPI("replay")
+    twitch = TwitchAPI()
+    twitch.token, twitch.token_expires_at = "replay", time.time() + 3600
+    latencies = {}
+
+    # Même rythme d'émission que la capture, compressé par le facteur speed
+    started = time.perf_counter()
+    tasks = []
+    for entry in entries:
+        delay = entry["t"] / args.speed - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(replay_one(riot, twitch, entry, latencies)))
+    await asyncio.gather(*tasks)
+    duration = time.perf_counter() - started
+
+    print(f"{len(entries)} requête(s) rejouée(s) en {duration:.1f}s (x{args.speed}), {server.unmatched} sans correspondance")
+    for host, values in sorted(latencies.items()):
+        print(f"  {host:<28}{len(values):>6} req  p50 {percentile(values, 0.5):>7.1f}ms  p95 {percentile(values, 0.95):>7.1f}ms  max {max(values):>7.1f}ms")
+    for lane, stats in riot.lane_stats().items():
+        print(f"  attente RateBucket {lane:<12} moy {stats['avg_wait_ms']}ms  max {stats['max_wait_ms']}ms")
+    await riot.close()
+    await server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Type non sérialisable en JSON: {type(obj).__name__}")
+
+
+# orjson quand il est installé, sinon json de la stdlib; la sortie est toujours compacte (bytes UTF-8)
+if orjson is not None:
+    BACKEND = "orjson"
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    BACKEND = "json"
+
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(obj):
+        return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dumps_str(obj):
+    return dumps(obj).decode('utf-8')
+
+
+def load_file(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path):
+    # Écriture dans un fichier temporaire puis remplacement atomique: pas de fichier tronqué en cas de crash
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(obj))
+    os.replace(tmp_path, path)
@@ -0,0 +1,171 @@
+import os
+import time
+import socket
+import sqlite3
+import importlib
+
+import codec
+from sharding import HashRing
+
+LEASE_SECONDS = int(os.getenv("COORDINATION_LEASE_SECONDS", 90))
+DEDUP_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+# Coordination entre instances via des lignes de bail: PostgreSQL si db_url est fourni,
+# sinon un fichier SQLite partagé (tests locaux, plusieurs processus sur la même machine)
+class Coordinator:
+    def __init__(self, db_url=None, path=None, instance_id=None, lease_seconds=LEASE_SECONDS):
+        self.db_url = db_url
+        self.path = path or os.path.join('data', 'coordination.db')
+        self.instance_id = instance_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.held = set()
+        self.members = (self.instance_id,)
+        self.ring = HashRing(self.members)
+        if db_url:
+            self.pg = importlib.import_module('psycopg2')
+            self.placeholder = '%s'
+        else:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.placeholder = '?'
+        self.init_database()
+
+    def _connect(self):
+        if self.db_url:
+            return self.pg.connect(self.db_url)
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _execute(self, statements):
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            results = []
+            for sql, params in statements:
+                cur.execute(sql.replace('%s', self.placeholder), params)
+                results.append(cur.fetchall() if cur.description else cur.rowcount)
+            conn.commit()
+            cur.close()
+            return results
+        finally:
+            conn.close()
+
+    def init_database(self):
+        self._execute([
+            ("""
+                CREATE TABLE IF NOT EXISTS coordination_leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    expires_at DOUBLE PRECISION NOT NULL
+                )
+            """, ()),
+            ("""
+                CREATE TABLE IF NOT EXISTS coordination_instances (
+                    instance_id TEXT PRIMARY KEY,
+                    heartbeat_at DOUBLE PRECISION NOT NULL
+                )
+            """, ()),
+            ("""
+                CREATE TABLE IF NOT EXISTS coordination_shared (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    updated_at DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+            """, ()),
+            ("""
+                CREATE TABLE IF NOT EXISTS coordination_dedup (
+                    key TEXT PRIMARY KEY,
+                    instance_id TEXT NOT NULL,
+                    created_at DOUBLE PRECISION NOT NULL
+                )
+            """, ()),
+        ])
+
+    def try_lead(self, name):
+        now = time.time()
+        _, rows = self._execute([
+            ("""
+                INSERT INTO coordination_leases (name, holder, expires_at) VALUES (%s, %s, %s)
+                ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE coordination_leases.holder = excluded.holder OR coordination_leases.expires_at < %s
+            """, (name, self.instance_id, now + self.lease_seconds, now)),
+            ("SELECT holder FROM coordination_leases WHERE name = %s", (name,)),
+        ])
+        leader = bool(rows) and rows[0][0] == self.instance_id
+        if leader:
+            self.held.add(name)
+        else:
+            self.held.discard(name)
+        return leader
+
+    def heartbeat(self):
+        now = time.time()
+        statements = [
+            ("""
+                INSERT INTO coordination_instances (instance_id, heartbeat_at) VALUES (%s, %s)
+                ON CONFLICT (instance_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+            """, (self.instance_id, now)),
+        ]
+        statements += [
+            ("UPDATE coordination_leases SET expires_at = %s WHERE name = %s AND holder = %s",
+             (now + self.lease_seconds, name, self.instance_id))
+            for name in sorted(self.held)
+        ]
+        statements += [
+            ("DELETE FROM coordination_instances WHERE heartbeat_at < %s", (now - 2 * self.lease_seconds,)),
+            ("DELETE FROM coordination_dedup WHERE created_at < %s", (now - DEDUP_RETENTION_SECONDS,)),
+            ("SELECT instance_id FROM coordination_instances WHERE heartbeat_at >= %s ORDER BY instance_id",
+             (now - self.lease_seconds,)),
+        ]
+        results = self._execute(statements)
+        for name, renewed in zip(sorted(self.held), results[1:1 + len(self.held)]):
+            if not renewed:
+                self.held.discard(name)
+
+        members = tuple(row[0] for row in results[-1]) or (self.instance_id,)
+        if members != self.members:
+            print(f"Instances actives: {', '.join(members)}")
+            self.members = members
+            self.ring = HashRing(members)
+        return members
+
+    def owns(self, key):
+        return self.ring.node_for(key) == self.instance_id
+
+    def claim(self, key):
+        inserted, = self._execute([
+            ("""
+                INSERT INTO coordination_dedup (key, instance_id, created_at) VALUES (%s, %s, %s)
+                ON CONFLICT (key) DO NOTHING
+            """, (key, self.instance_id, time.time())),
+        ])
+        return inserted == 1
+
+    def unclaim(self, key):
+        self._execute([("DELETE FROM coordination_dedup WHERE key = %s", (key,))])
+
+    # Résultats calculés par le propriétaire d'une clé (ex: rangs du classement), relus par les autres instances
+    def publish(self, kind, items):
+        now = time.time()
+        self._execute([
+            ("""
+                INSERT INTO coordination_shared (kind, key, payload, updated_at) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (kind, key) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at
+            """, (kind, key, codec.dumps_str(payload), now))
+            for key, payload in items.items()
+        ])
+
+    def changes(self, kind, since=0):
+        rows, = self._execute([
+            ("SELECT key, payload, updated_at FROM coordination_shared WHERE kind = %s AND updated_at > %s", (kind, since)),
+        ])
+        return [(key, codec.loads(payload), updated_at) for key, payload, updated_at in rows]
+
+    def release(self):
+        self._execute(
+            [("DELETE FROM coordination_leases WHERE holder = %s", (self.instance_id,)),
+             ("DELETE FROM coordination_instances WHERE instance_id = %s", (self.instance_id,))]
+        )
+        self.held.clear()
@@ -0,0 +1,182 @@
+from datetime import datetime
+from functools import lru_cache
+from discord import Embed, Colour
+
+MONTHS = ("janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre", "octobre", "novembre", "décembre")
+DAYS = ("lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche")
+
+CATEGORY_NAMES = {
+    'lec': '🏆 LEC',
+    'lfl': '🇫🇷 LFL',
+    'rl': '🚗 Rocket League',
+    'r6': '🎯 Rainbow Six',
+    'chess': '♟️ Échecs'
+}
+
+RANK_COLORS = {
+    "IRON": 0x8B4513,
+    "BRONZE": 0xCD7F32,
+    "SILVER": 0xC0C0C0,
+    "GOLD": 0xFFD700,
+    "PLATINUM": 0x40E0D0,
+    "EMERALD": 0x50C878,
+    "DIAMOND": 0xB9F2FF,
+    "MASTER": 0x9932CC,
+    "GRANDMASTER": 0xFF0000,
+    "CHALLENGER": 0x00CED1
+}
+
+RANK_SHORT = {
+    "IRON": "I",
+    "BRONZE": "B",
+    "SILVER": "S",
+    "GOLD": "G",
+    "PLATINUM": "P",
+    "EMERALD": "E",
+    "DIAMOND": "D",
+    "MASTER": "M",
+    "GRANDMASTER": "GM",
+    "CHALLENGER": "C"
+}
+DIVISIONS = {"I": "1", "II": "2", "III": "3", "IV": "4"}
+APEX_TIERS = ("MASTER", "GRANDMASTER", "CHALLENGER")
+
+
+class EmbedTemplate:
+    def __init__(self, color, title=None, footer=None):
+        self.colour = Colour(color)
+        self.title = title
+        self.footer = footer
+
+    def render(self, fields=(), title=None, description=None, url=None, footer=None, image=None, thumbnail=None, timestamp=None, author=None, author_icon=None):
+        embed = Embed(title=title or self.title, description=description, url=url, colour=self.colour, timestamp=timestamp)
+        if author:
+            embed.set_author(name=author, url=url, icon_url=author_icon)
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        if footer or self.footer:
+            embed.set_footer(text=footer or self.footer)
+        if image:
+            embed.set_image(url=image)
+        if thumbnail:
+            embed.set_thumbnail(url=thumbnail)
+        return embed
+
+
+# Templates précompilés: couleur et textes fixes construits une seule fois au chargement du module
+STREAM_TEMPLATE = EmbedTemplate(0x9146ff)
+EVENT_TEMPLATE = EmbedTemplate(0x00AE86)
+NOTIFICATION_TEMPLATES = {
+    True: EmbedTemplate(0xFF0000),
+    False: EmbedTemplate(0xFFA500),
+}
+LIVE_GAME_TEMPLATE = EmbedTemplate(0x00ff41, title="PARTIE DÉTECTÉE !", footer="GL HF ! • Message supprimé dans 25 min")
+EMPTY_FIELD = ("\u200b", "\u200b", True)
+
+
+@lru_cache(maxsize=1024)
+def format_date(date):
+    return f"{DAYS[date.weekday()]} {date.day} {MONTHS[date.month - 1]} {date.year} à {date.strftime('%H:%M')}"
+
+
+def format_viewer_count(count):
+    if count >= 1000:
+        return f"{count//1000}k"
+    return str(count)
+
+
+def stream_embed(stream, username, footer_text, user=None, game=None):
+    fields = [("👥 Viewers", f"**{format_viewer_count(stream.get('viewer_count', 0))}** spectateurs", True)]
+    if stream.get('game_name'):
+        fields.append(("🎮 Jeu", stream['game_name'], True))
+
+    # Avatar et jaquette viennent du cache de métadonnées Twitch, absents tant qu'il n'est pas rempli
+    return STREAM_TEMPLATE.render(
+        fields,
+        title=f"🔴 {stream['user_name']} est en live !",
+        description=stream['title'],
+        url=f"https://twitch.tv/{username}",
+        footer=footer_text,
+        image=stream.get('thumbnail_url', '').replace('{width}', '1280').replace('{height}', '720'),
+        thumbnail=game.get('box_art_url', '').replace('{width}', '144').replace('{height}', '192') if game else None,
+        author=stream['user_name'] if user and user.get('profile_image_url') else None,
+        author_icon=user.get('profile_image_url') if user else None
+    )
+
+
+def create_event_embed(event, detailed=False):
+    fields = [("📅 Date", format_date(event.date), True)]
+
+    if getattr(event, 'category', None):
+        fields.append(("🎮 Catégorie", CATEGORY_NAMES.get(event.category, f"🎮 {event.category.upper()}"), True))
+    else:
+        fields.append(EMPTY_FIELD)
+
+    if event.lieu:
+        fields.append(("📍 Lieu", event.lieu, True))
+    if event.stream:
+        fields.append(("📺 Stream", event.stream, False))
+    if event.description and detailed:
+        fields.append(("📝 Description", event.description, False))
+
+    image = None
+    if event.image and event.image.strip():
+        if event.image.startswith(('http://', 'https://')):
+            image = event.image
+        else:
+            fields.append(("⚠️ Image", "URL d'image invalide", False))
+
+    return EVENT_TEMPLATE.render(fields, title=f"🎉 {event.name}", footer=f"Créé par {event.creator}", image=image, timestamp=event.created_at)
+
+
+def create_notification_embed(event, minutes_before, now=None):
+    if minutes_before == 0:
+        title = f"🔴 LIVE MAINTENANT - {event.name}"
+        message = "L'événement commence maintenant !"
+    else:
+        title = f"⏰ {event.name} - Dans {minutes_before} minutes"
+        message = f"L'événement commence dans {minutes_before} minutes !"
+
+    fields = [("📅 Heure de début", format_date(event.date), True)]
+
+    if getattr(event, 'category', None):
+        fields.append(("🎮 Catégorie", CATEGORY_NAMES.get(event.category, event.category.upper()), True))
+    if event.lieu:
+        fields.append(("📍 Lieu", event.lieu, True))
+    if event.stream:
+        fields.append(("📺 Stream", event.stream, False))
+
+    image = event.image if event.image and event.image.startswith(('http://', 'https://')) else None
+    return NOTIFICATION_TEMPLATES[minutes_before == 0].render(fields, title=title, description=message, image=image, timestamp=now or datetime.now())
+
+
+def format_rank_short(entry):
+    if not entry:
+        return "NC"
+    tier = entry.get("tier", "")
+    if tier in APEX_TIERS:
+        return f"{RANK_SHORT[tier]} {entry.get('leaguePoints', 0)}LP"
+    return f"{RANK_SHORT.get(tier, tier[:1])}{DIVISIONS.get(entry.get('rank'), '')}"
+
+
+@lru_cache(maxsize=512)
+def render_teams(red_team, blue_team):
+    red = ' • '.join(f"**{name}**{f' `{rank}`' if rank else ''}{' ⭐' if starred else ''}" for name, starred, rank in red_team)
+    blue = ' • '.join(f"**{name}**{f' `{rank}`' if rank else ''}{' ⭐' if starred else ''}" for name, starred, rank in blue_team)
+    return f"🔴 {red}\n\n⚡ **VS** ⚡\n\n🔵 {blue}"
+
+
+def live_game_embed(gamename, champion, game_mode, duration, region_short, teams_display, stream_url=None, champion_icon=None):
+    fields = [
+        ("Infos", f"Durée: {duration} min\nRégion: {region_short}\nMode: {game_mode}", True),
+        ("Équipes", teams_display, False),
+    ]
+    if stream_url:
+        fields.append(("Stream", f"[Regarder maintenant]({stream_url})", True))
+
+    return LIVE_GAME_TEMPLATE.render(
+        fields,
+        description=f"**{gamename}** joue **{champion}** en **{game_mode}**",
+        thumbnail=champion_icon,
+        timestamp=datetime.now()
+    )
@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+
+import codec
+
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", 50)) * 1024 * 1024
+
+
+# Cache disque des réponses HTTP avec validateurs (ETag/Last-Modified) pour les GET conditionnels,
+# borné en taille avec éviction LRU
+class HttpCache:
+    def __init__(self, directory=None, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.directory = directory or os.path.join('data', 'http_cache')
+        self.index_file = os.path.join(self.directory, 'index.json')
+        self.max_bytes = max_bytes
+        self.entries = {}
+        self.hits = 0
+        self.revalidated_count = 0
+        self.misses = 0
+        # Écritures disque dans des threads (asyncio.to_thread): l'index est partagé avec la boucle
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.index_file):
+                self.entries = {
+                    url: entry for url, entry in codec.load_file(self.index_file).items()
+                    if os.path.exists(self._path(entry["key"]))
+                }
+        except Exception as e:
+            print("Erreur chargement index du cache HTTP:", e)
+            self.entries = {}
+
+    def _save(self):
+        with self._lock:
+            entries = dict(self.entries)
+        try:
+            with self._save_lock:
+                codec.dump_file(entries, self.index_file)
+        except Exception as e:
+            print("Erreur sauvegarde index du cache HTTP:", e)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _read(self, url):
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        try:
+            with open(self._path(entry["key"]), 'rb') as f:
+                body = f.read()
+        except OSError:
+            with self._lock:
+                self.entries.pop(url, None)
+            return None
+        entry["last_used"] = time.time()
+        return body
+
+    def size(self):
+        with self._lock:
+            return sum(entry["size"] for entry in self.entries.values())
+
+    def fresh(self, url, max_age):
+        entry = self.entries.get(url)
+        if entry is None or time.time() - entry["fetched_at"] > max_age:
+            return None
+        body = self._read(url)
+        if body is not None:
+            self.hits += 1
+        return body
+
+    def stale(self, url):
+        return self._read(url)
+
+    def validators(self, url):
+        entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def revalidated(self, url):
+        # None si l'entrée a été évincée pendant la requête: l'appelant refait un GET sans validateurs
+        body = self._read(url)
+        entry = self.entries.get(url)
+        if body is None or entry is None:
+            return None
+        entry["fetched_at"] = time.time()
+        self.revalidated_count += 1
+        # Sans réécriture de l'index, l'entrée redeviendrait périmée au redémarrage
+        await asyncio.to_thread(self._save)
+        return body
+
+    async def store(self, url, body, headers):
+        self.misses += 1
+        await asyncio.to_thread(self._store, url, body, {"ETag": headers.get("ETag"), "Last-Modified": headers.get("Last-Modified")})
+
+    def _store(self, url, body, headers):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        path = self._path(key)
+        with self._save_lock:
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(body)
+            os.replace(f"{path}.tmp", path)
+        now = time.time()
+        with self._lock:
+            self.entries[url] = {
+                "key": key,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "size": len(body),
+                "fetched_at": now,
+                "last_used": now,
+            }
+            self._evict()
+        self._save()
+
+    def _evict(self):
+        with self._lock:
+            total = self.size()
+            for url, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._path(entry["key"]))
+                except OSError:
+                    pass
+                total -= entry["size"]
+                del self.entries[url]
+
+    async def fetch(self, session, url, max_age=0, headers=None):
+        body = self.fresh(url, max_age)
+        if body is not None:
+            return body
+        try:
+            async with session.get(url, headers={**(headers or {}), **self.validators(url)}) as response:
+                if response.status == 304:
+                    body = await self.revalidated(url)
+                    if body is not None:
+                        return body
+                elif response.status == 200:
+                    body = await response.read()
+                    await self.store(url, body, response.headers)
+                    return body
+                else:
+                    print(f"Cache HTTP: {url} a répondu {response.status}")
+                    return self.stale(url)
+        except Exception as e:
+            print(f"Cache HTTP: erreur réseau sur {url}: {e}")
+            return self.stale(url)
+        # 304 pour une entrée évincée entre-temps: traité comme un échec de cache, GET inconditionnel
+        return await self.fetch(session, url, 0, headers)
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size(),
+            "hits": self.hits,
+            "revalidated": self.revalidated_count,
+            "misses": self.misses,
+        }
@@ -0,0 +1,70 @@
+import time
+import asyncio
+
+LEAGUE_TTL = 15 * 60
+# Erreur API (quota, 5xx): distincte de None qui signifie "non classé", jamais mise en cache
+FETCH_FAILED = object()
+
+
+class LeagueCache:
+    def __init__(self, riot_api, ttl=LEAGUE_TTL):
+        self.riot_api = riot_api
+        self.ttl = ttl
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+
+    @staticmethod
+    def solo_queue(league_data):
+        return next((q for q in league_data if q.get("queueType") == "RANKED_SOLO_5x5"), None)
+
+    def remember(self, puuid, league_data):
+        solo = self.solo_queue(league_data)
+        self.entries[puuid] = (time.time() + self.ttl, solo)
+        return solo
+
+    async def get(self, puuid, region):
+        entry = self.entries.get(puuid)
+        if entry and entry[0] > time.time():
+            self.hits += 1
+            return entry[1]
+
+        if puuid not in self._inflight:
+            self.misses += 1
+            self._inflight[puuid] = asyncio.ensure_future(self._fetch(puuid, region))
+        return await asyncio.shield(self._inflight[puuid])
+
+    async def _fetch(self, puuid, region):
+        try:
+            league_data = await self.riot_api.get_league_by_puuid(puuid, region)
+            if "status" in league_data:
+                return FETCH_FAILED
+            return self.remember(puuid, league_data)
+        finally:
+            del self._inflight[puuid]
+
+    def lookup_many(self, puuids, region):
+        # Lancées en parallèle: le débit réel reste plafonné par le RateBucket de la région
+        return {puuid: asyncio.ensure_future(self.get(puuid, region)) for puuid in set(puuids) if puuid}
+
+    @staticmethod
+    def _failed(task):
+        return task.done() and (task.cancelled() or task.exception() is not None or task.result() is FETCH_FAILED)
+
+    def retry_failed(self, lookups, region):
+        failed = [puuid for puuid, task in lookups.items() if self._failed(task)]
+        for puuid in failed:
+            lookups[puuid] = asyncio.ensure_future(self.get(puuid, region))
+        return len(failed)
+
+    async def wait_ranks(self, lookups, timeout):
+        if lookups:
+            await asyncio.wait(lookups.values(), timeout=timeout)
+        return {
+            puuid: task.result() for puuid, task in lookups.items()
+            if task.done() and not self._failed(task)
+        }
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
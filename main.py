@@ -14,21 +14,33 @@ if sys.version_info >= (3, 13):
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands, Embed
-import aiohttp
 import asyncio
 import os
-import json
 import logging
 from datetime import datetime, UTC, timedelta
-import threading
-from aiohttp import web
-import pytz
+from zoneinfo import ZoneInfo
 from typing import Optional
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import importlib
 import time
 import signal
-import urllib.parse
+import threading
+import hmac
+import pickle
+import codec
+import traffic
+from riot_api import RiotAPI, riot_lane, INTERACTIVE, BACKGROUND, INTERACTIVE_SHARE
+from riot_resolver import RiotIdResolver
+from league_cache import LeagueCache
+from twitch_api import TwitchAPI
+from twitch_resolver import TwitchUserResolver
+from twitch_metadata import TwitchMetadataCache
+from ranking import RankingIndex
+from workers import WorkerHub
+from coordination import Coordinator
+from snapshot import encode_snapshot, write_snapshot, read_snapshot, SnapshotError
+from profiling import timed, timer, registry, enable_slow_callback_detection, profile_loop, loop_monitor
+from startup import StartupManager, sync_command_tree, client_options, message_handle
+from embeds import RANK_COLORS, stream_embed, create_event_embed, create_notification_embed, render_teams, live_game_embed, format_rank_short
 
 region_mapping = {
     "euw": "euw1",
@@ -58,26 +70,37 @@ queue_mapping = {
 
 reverse_region_mapping = {v: k for k, v in region_mapping.items()}
 
-intents = discord.Intents.default()
-intents.message_content = True
-intents.guilds = True
-intents.reactions = True
+class LazyInstance:
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        # Peut être appelé depuis un thread (voir open_storage): une seule construction
+        with self._lock:
+            if self._instance is None:
+                self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self._instance if self._instance is not None else self.resolve(), name)
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+def load_psycopg2():
+    psycopg2 = importlib.import_module('psycopg2')
+    importlib.import_module('psycopg2.extras')
+    return psycopg2
 
-TIMEZONE = pytz.timezone('Europe/Paris')
+bot = commands.Bot(command_prefix='!', **client_options())
+
+TIMEZONE = ZoneInfo('Europe/Paris')
 def get_current_time(): return datetime.now(TIMEZONE)
 def parse_date(date_str):
     try:
         naive = datetime.strptime(date_str, "%d/%m/%Y %H:%M")
-        return TIMEZONE.localize(naive)
+        return naive.replace(tzinfo=TIMEZONE)
     except: return None
 
-def format_date(date):
-    months = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
-    days = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
-    return f"{days[date.weekday()]} {date.day} {months[date.month - 1]} {date.year} à {date.strftime('%H:%M')}"
-
 bot_start_time = time.time()
 
 web_runner = None
@@ -87,6 +110,8 @@ async def start_web_server():
     global web_runner, web_site
     
     try:
+        from aiohttp import web
+
         async def health_check(request):
             bot_status = "CONNECTÉ" if bot.is_ready() else "DÉCONNECTÉ"
             notif_status = "ACTIF" if notification_system.is_running() else "ARRÊTÉ"
@@ -114,6 +139,8 @@ async def start_web_server():
                 "storage": stream_manager.backend(),
                 "status": "healthy" if bot.is_ready() else "degraded",
                 "timestamp": datetime.now(TIMEZONE).isoformat(),
+                "startup": startup_manager.timings,
+                "event_loop": loop_monitor.snapshot(),
                 "bot": {
                     "connected": bot.is_ready(),
                     "latency_ms": round(bot.latency * 1000) if bot.is_ready() else None,
@@ -125,16 +152,53 @@ async def start_web_server():
                     "lol_watcher_running": game_watcher.is_running(),
                     "events_count": len(events),
                     "streamers_count": sum(len(s) for s in streamers.values()),
-                    "lol_players_count": sum(len(p) for p in watched_players.values())
+                    "lol_players_count": sum(len(p) for p in watched_players.values()),
+                    "matches_stored": match_store.count(),
+                    "match_ingestion_pending": match_ingestion_queue.qsize(),
+                    "riot_id_cache": riot_id_resolver.stats(),
+                    "http_cache": getSummoner.cache.stats(),
+                    "league_cache": league_cache.stats(),
+                    "riot_lanes": getSummoner.lane_stats(),
+                    "live_games_cached": len(live_games),
+                    "twitch_metadata": twitch_metadata.stats(),
+                    "snapshot": snapshot_info,
+                    "coordination": {
+                        "instance": coordinator.instance_id,
+                        "members": list(coordinator.members),
+                        "leases": sorted(coordinator.held)
+                    } if coordinator else None
                 }
             }
-            return web.json_response(health_data)
+            return web.json_response(health_data, dumps=codec.dumps_str)
+
+        def is_admin_request(request):
+            token = os.getenv("PROFILER_TOKEN")
+            provided = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+            return bool(token) and hmac.compare_digest(provided, token)
+
+        async def debug_timings(request):
+            if not is_admin_request(request):
+                return web.Response(status=403, text="Accès refusé")
+            return web.json_response({"timings": registry.snapshot(), "slow_callbacks": list(registry.slow_callbacks)}, dumps=codec.dumps_str)
+
+        async def debug_profile(request):
+            if not is_admin_request(request):
+                return web.Response(status=403, text="Accès refusé")
+            try:
+                seconds = min(max(float(request.query.get("seconds", 10)), 0.1), 60)
+                interval = min(max(float(request.query.get("interval_ms", 5)), 1), 1000) / 1000
+            except ValueError:
+                return web.Response(status=400, text="Paramètres invalides")
+            collapsed = await profile_loop(seconds, interval)
+            return web.Response(text=collapsed, headers={'Content-Type': 'text/plain; charset=utf-8'})
         
         app = web.Application()
         app.router.add_get('/', health_check)
         app.router.add_get('/health', health_check)
         app.router.add_get('/health.json', health_json)
         app.router.add_get('/ping', lambda request: web.Response(text="pong"))
+        app.router.add_get('/debug/timings', debug_timings)
+        app.router.add_get('/debug/profile', debug_profile)
         
         port = int(os.getenv('PORT', 8080))
         host = '0.0.0.0'
@@ -148,17 +212,18 @@ async def start_web_server():
         return True
         
     except Exception as e:
-        print(f"Erreur dans notification_system: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"Erreur serveur web: {e}")
+        return False
 
 async def send_event_notification(event, minutes_before):
     try:
         channel = bot.get_channel(event.channel_id)
         if not channel: 
             return None
+        if not await claim_notification(f"event:{event.channel_id}:{event.name}:{event.date.isoformat()}:{minutes_before}"):
+            return None
         
-        embed = create_notification_embed(event, minutes_before)
+        embed = create_notification_embed(event, minutes_before, get_current_time())
         
         content = ""
         if event.role_id:
@@ -180,16 +245,11 @@ async def delete_event_message(event_id):
             del notifications_sent[event_id]
         if event_id in notification_messages:
             del notification_messages[event_id]
+        await asyncio.to_thread(event_manager.delete_event, event_id)
     except Exception as e:
         print(f"Erreur lors du nettoyage: {e}")
 
-@notification_system.before_loop
-async def before_notification_system():
-    await bot.wait_until_ready()
-
 watched_players = {}
-champion_cache = {}
-latest_version = None
 
 ADMIN_IDS = [123456789012345678, 987654321098765432]
 WATCH_PING_ROLE_ID = None
@@ -199,193 +259,42 @@ def admin_only():
         return ctx.author.id in ADMIN_IDS
     return commands.check(predicate)
 
-class RiotAPI:
-    def __init__(self, api_key):
-        self.api_key = api_key
-
-    async def request(self, url):
-        try:
-            if '\n' in url or '\r' in url:
-                print(f"URL dangereuse détectée: {repr(url)}")
-                return {"status": {"status_code": 400, "message": "URL invalide"}}
-            
-            headers = {
-                "X-Riot-Token": str(self.api_key).strip(),
-                "User-Agent": "Mozilla/5.0 (Discord Bot)"
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    print(f"API Request: {url}")
-                    print(f"Status Code: {response.status}")
-                    
-                    if response.status == 403:
-                        print("Clé API invalide ou expirée!")
-                        return {"status": {"status_code": 403, "message": "Clé API invalide"}}
-                    elif response.status == 404:
-                        print("Ressource non trouvée")
-                        return {"status": {"status_code": 404, "message": "Joueur non trouvé"}}
-                    elif response.status == 429:
-                        print("Limite de taux dépassée")
-                        return {"status": {"status_code": 429, "message": "Trop de requêtes"}}
-                    elif response.status != 200:
-                        print(f"Erreur HTTP {response.status}")
-                        return {"status": {"status_code": response.status, "message": f"Erreur HTTP {response.status}"}}
-                    
-                    data = await response.json()
-                    return data
-        except Exception as e:
-            print(f"Erreur de requête: {e}")
-            return {"status": {"status_code": 500, "message": f"Erreur réseau: {str(e)}"}}
-
-    async def get_latest_version(self):
-        global latest_version
-        if latest_version:
-            return latest_version
-            
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get("https://ddragon.leagueoflegends.com/api/versions.json") as response:
-                    if response.status == 200:
-                        versions = await response.json()
-                        latest_version = versions[0]
-                        print(f"Version LoL détectée: {latest_version}")
-                        return latest_version
-                    return "14.24.1"
-        except Exception as e:
-            print(f"Error getting latest version: {e}")
-            return "14.24.1"
-
-    async def get_champion_data(self):
-        global champion_cache
-        
-        if champion_cache:
-            return champion_cache
-        
-        try:
-            version = await self.get_latest_version()
-            url = f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion.json"
-            print(f"Récupération champions version {version}")
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        champion_cache = data.get("data", {})
-                        print(f"{len(champion_cache)} champions chargés en cache")
-                        return champion_cache
-                    return {}
-        except Exception as e:
-            print(f"Error getting champion data: {e}")
-            return {}
-
-    async def find_champion_by_id(self, champion_id):
-        if champion_id == 0:
-            return {
-                "name": "Inconnu",
-                "id": "Unknown",
-                "icon_url": "https://ddragon.leagueoflegends.com/cdn/14.24.1/img/profileicon/29.png"
-            }
-        
-        champion_data = await self.get_champion_data()
-        version = await self.get_latest_version()
-        
-        for champion_key, champion_info in champion_data.items():
-            if int(champion_info.get("key", 0)) == champion_id:
-                return {
-                    "name": champion_info.get("name", "Champion Inconnu"),
-                    "id": champion_info.get("id", "Unknown"),
-                    "icon_url": f"https://ddragon.leagueoflegends.com/cdn/{version}/img/champion/{champion_info.get('id', 'Unknown')}.png"
-                }
-        
-        static_champions = {
-            887: {"name": "Briar", "id": "Briar"},
-            895: {"name": "Naafiri", "id": "Naafiri"},
-            950: {"name": "Smolder", "id": "Smolder"},
-            901: {"name": "Aurora", "id": "Aurora"}
-        }
-        
-        if champion_id in static_champions:
-            champ_info = static_champions[champion_id]
-            return {
-                "name": champ_info["name"],
-                "id": champ_info["id"],
-                "icon_url": f"https://ddragon.leagueoflegends.com/cdn/{version}/img/champion/{champ_info['id']}.png"
-            }
-        
-        return {
-            "name": f"Champion #{champion_id}",
-            "id": "Unknown",
-            "icon_url": f"https://ddragon.leagueoflegends.com/cdn/{version}/img/profileicon/29.png"
-        }
-        
-    def validate_player_input(self, gamename_with_tag):
-        if not gamename_with_tag or "#" not in gamename_with_tag:
-            return None, None, "Format incorrect. Utilisez: NomJoueur#TAG"
-        
-        try:
-            parts = gamename_with_tag.strip().split("#")
-            if len(parts) != 2:
-                return None, None, "Format incorrect. Un seul # autorisé."
-            
-            gamename = parts[0].strip()
-            tagline = parts[1].strip()
-            
-            if not gamename or not tagline:
-                return None, None, "Le nom et le tag ne peuvent pas être vides."
-            
-            if len(gamename) > 16 or len(tagline) > 5:
-                return None, None, "Nom trop long (max 16 caractères) ou tag trop long (max 5)."
-            
-            forbidden_chars = ['\n', '\r', '\t', '\0']
-            for char in forbidden_chars:
-                if char in gamename or char in tagline:
-                    return None, None, "Caractères interdits détectés."
-            
-            return gamename, tagline, None
-            
-        except Exception as e:
-            return None, None, f"Erreur de validation: {str(e)}"
-
-    async def get_summoner_by_riot_id(self, gameName, tagLine):
-        gameName = urllib.parse.quote(str(gameName).strip().replace('\n', '').replace('\r', ''), safe='')
-        tagLine = urllib.parse.quote(str(tagLine).strip().replace('\n', '').replace('\r', ''), safe='')
-        
-        if not gameName or not tagLine:
-            return {"status": {"status_code": 400, "message": "Nom de joueur ou tag invalide"}}
-        
-        url = f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{gameName}/{tagLine}"
-        return await self.request(url)
-
-    async def get_summoner_by_puuid(self, encryptedPUUID, region):
-        url = f"https://{region}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{encryptedPUUID}"
-        return await self.request(url)
-
-    async def get_league_by_summoner(self, encryptedSummonerId, region):
-        url = f"https://{region}.api.riotgames.com/lol/league/v4/entries/by-summoner/{encryptedSummonerId}"
-        return await self.request(url)
-
-    async def get_match_history(self, encryptedPUUID, start=0, count=10):
-        url = f"https://europe.api.riotgames.com/lol/match/v5/matches/by-puuid/{encryptedPUUID}/ids?start={start}&count={count}&queue=420"
-        return await self.request(url)
-    
-    async def get_match_history_all_queues(self, encryptedPUUID, start=0, count=10):
-        url = f"https://europe.api.riotgames.com/lol/match/v5/matches/by-puuid/{encryptedPUUID}/ids?start={start}&count={count}"
-        return await self.request(url)
-
-    async def get_match(self, matchId):
-        url = f"https://europe.api.riotgames.com/lol/match/v5/matches/{matchId}"
-        return await self.request(url)
-
-    async def get_live_game(self, encryptedPUUID, region):
-        url = f"https://{region}.api.riotgames.com/lol/spectator/v5/active-games/by-summoner/{encryptedPUUID}"
-        return await self.request(url)
-
-    async def get_free_champion_rotation(self):
-        url = f"https://euw1.api.riotgames.com/lol/platform/v3/champion-rotations"
-        return await self.request(url)
-
 getSummoner = RiotAPI(os.getenv("RIOT_API_KEY"))
+riot_id_resolver = RiotIdResolver(getSummoner)
+
+MATCH_INGESTION_COUNT = 10
+def open_match_store():
+    from match_store import MatchStore
+    return MatchStore()
+
+match_store = LazyInstance(open_match_store)
+match_ingestion_queue = asyncio.Queue()
+pending_ingestion = set()
+stats_index = None
+stats_index_task = None
+stats_index_backlog = []
+
+async def build_stats_index():
+    global stats_index
+    from player_stats import PlayerStatsIndex
+    index = PlayerStatsIndex()
+    # La connexion SQLite principale doit être ouverte sur la boucle avant de passer le store au thread
+    match_store.count()
+    await asyncio.to_thread(index.load_from_store, match_store)
+    # Matchs ingérés pendant la construction (add_match ignore les doublons)
+    for match in stats_index_backlog:
+        index.add_match(match)
+    stats_index_backlog.clear()
+    stats_index = index
+    print(f"Index de statistiques chargé: {len(stats_index)} lignes, {len(stats_index.match_ids)} matchs")
+
+async def get_stats_index():
+    global stats_index_task
+    if stats_index is None:
+        if stats_index_task is None or (stats_index_task.done() and stats_index_task.exception()):
+            stats_index_task = asyncio.ensure_future(build_stats_index())
+        await asyncio.shield(stats_index_task)
+    return stats_index
 
 async def delete_messages_after_delay(ctx, bot_message, delay_minutes=3):
     await asyncio.sleep(delay_minutes * 60)
@@ -463,22 +372,25 @@ async def create_event(
             else:
                 print(f"Aucun rôle automatique trouvé pour {category}")
         
-        event = Event(event_id_counter, nom, dt, interaction.user.display_name, interaction.guild_id, interaction.channel_id, 
+        event = Event(None, nom, dt, interaction.user.display_name, interaction.guild_id, interaction.channel_id, 
                       role.id if role else None, category, stream, lieu, image, description)
-        events[event_id_counter] = event
+        sent = {"15min": False, "live": False}
+        # Persisté avant tout: l'instance qui détient le bail des notifications peut ne pas être celle-ci
+        event.id = await asyncio.to_thread(event_manager.add_event, {k: v for k, v in event_to_dict(event).items() if k != "id"}, sent)
+        event_id_counter = max(event_id_counter, event.id + 1)
+        events[event.id] = event
+        notifications_sent[event.id] = sent
+        notification_messages[event.id] = []
         embed = create_event_embed(event, detailed=True)
         
         message = await interaction.followup.send(embed=embed)
         
         try:
-            event_messages[event_id_counter] = message
+            event_messages[event.id] = message_handle(message)
+            await asyncio.to_thread(event_manager.set_message, event.id, message.channel.id, message.id)
         except Exception as e:
             print(f"Erreur lors du stockage du message: {e}")
         
-        notifications_sent[event_id_counter] = {"15min": False, "live": False}
-        notification_messages[event_id_counter] = []
-        event_id_counter += 1
-        
     except Exception as e:
         print(f"Erreur dans create_event: {e}")
         try:
@@ -508,13 +420,15 @@ async def add_streamer(interaction: discord.Interaction, usernames: str):
     channel_id = interaction.channel_id
     added = []
     already = []
+    user_ids = await twitch_user_resolver.resolve_logins(username_list)
+    unknown = [u for u in username_list if u not in user_ids]
 
-    for username in username_list:
-        ok, msg = stream_manager.add_stream(username, interaction.guild_id, channel_id)
+    for username, user_id in user_ids.items():
+        ok, msg = await asyncio.to_thread(stream_manager.add_stream, username, interaction.guild_id, channel_id, user_id)
         if ok:
             streamers.setdefault(channel_id, [])
-            if username not in streamers[channel_id]:
-                streamers[channel_id].append(username)
+            if user_id not in streamers[channel_id]:
+                streamers[channel_id].append(user_id)
             added.append(username)
         else:
             if "déjà" in msg or "present" in msg.lower():
@@ -523,6 +437,7 @@ async def add_streamer(interaction: discord.Interaction, usernames: str):
     parts = []
     if added: parts.append(f"Ajouté(s): {', '.join(added)}")
     if already: parts.append(f"Déjà suivi(s): {', '.join(already)}")
+    if unknown: parts.append(f"Introuvable(s) sur Twitch: {', '.join(unknown)}")
     if not parts: parts.append("Aucun streamer ajouté.")
     await interaction.followup.send('\n'.join(parts), ephemeral=True)
 
@@ -534,10 +449,18 @@ async def set_ping_role(interaction: discord.Interaction, role: discord.Role):
         return
     try:
         ping_roles[interaction.channel_id] = role.id
+        stream_state_manager.set_ping_role(interaction.channel_id, role.id)
+        await asyncio.to_thread(stream_state_manager.flush)
         await interaction.response.send_message(f"Le rôle {role.mention} sera ping lorsque quelqu'un sera en live dans ce salon.", ephemeral=True)
     except Exception as e:
         await interaction.response.send_message(f"Erreur : {e}", ephemeral=True)
 
+# Les commandes utilisateur passent devant le polling dans le budget Riot (les tâches de fond
+# lancées depuis une commande repassent explicitement en BACKGROUND)
+@bot.before_invoke
+async def use_interactive_riot_lane(ctx):
+    riot_lane.set(INTERACTIVE)
+
 @bot.command(name='profile')
 async def profile(ctx, gamename: str, region: str = "euw"):
     print(f"Profile command called by {ctx.author} with gamename: {gamename}, region: {region}")
@@ -555,7 +478,7 @@ async def profile(ctx, gamename: str, region: str = "euw"):
         region = region.lower()
         region = region_mapping.get(region, "euw1")
 
-        summoner_account = await getSummoner.get_summoner_by_riot_id(gamename_only, tagline)
+        summoner_account = await riot_id_resolver.resolve(gamename_only, tagline, region)
         
         if "status" in summoner_account:
             bot_message = await loading_msg.edit(content=f"Ce joueur n'existe pas: {summoner_account.get('status', {}).get('message', 'Erreur inconnue')}")
@@ -612,19 +535,7 @@ async def profile(ctx, gamename: str, region: str = "euw"):
             rank_color = 0x808080
         else:
             description = f"{tier.title()} {rank} - {lp} LP"
-            rank_colors = {
-                "IRON": 0x8B4513,
-                "BRONZE": 0xCD7F32,
-                "SILVER": 0xC0C0C0,
-                "GOLD": 0xFFD700,
-                "PLATINUM": 0x40E0D0,
-                "EMERALD": 0x50C878,
-                "DIAMOND": 0xB9F2FF,
-                "MASTER": 0x9932CC,
-                "GRANDMASTER": 0xFF0000,
-                "CHALLENGER": 0x00CED1
-            }
-            rank_color = rank_colors.get(tier.upper(), 0x5CDBF0)
+            rank_color = RANK_COLORS.get(tier.upper(), 0x5CDBF0)
 
         embed = Embed(
             title=f"{gamename_only}#{tagline}",
@@ -659,6 +570,111 @@ async def profile(ctx, gamename: str, region: str = "euw"):
         bot_message = await loading_msg.edit(content=f"Une erreur est survenue: {str(e)}")
         asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
 
+@bot.command(name='stats')
+async def stats(ctx, gamename: str, region: str = "euw", count: int = 20):
+    loading_msg = await ctx.send("Calcul des statistiques en cours...")
+
+    try:
+        if "#" not in gamename:
+            bot_message = await loading_msg.edit(content="Format incorrect. Utilisez: `!stats gamename#tagline [region] [nombre]` (ex: `!stats Faker#KR1 kr 50`)")
+            asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+            return
+
+        tagline = gamename.split("#")[1]
+        gamename_only = gamename.split("#")[0]
+        region = region_mapping.get(region.lower(), "euw1")
+        count = max(1, min(count, 1000))
+
+        summoner_account = await riot_id_resolver.resolve(gamename_only, tagline, region)
+        if "status" in summoner_account or "puuid" not in summoner_account:
+            bot_message = await loading_msg.edit(content=f"Ce joueur n'existe pas: {summoner_account.get('status', {}).get('message', 'Erreur inconnue')}")
+            asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+            return
+
+        puuid = summoner_account["puuid"]
+        player_stats = (await get_stats_index()).player_stats(puuid, count)
+
+        if not player_stats:
+            queue_match_ingestion(puuid, region)
+            bot_message = await loading_msg.edit(content=f"Aucune partie enregistrée pour **{gamename_only}#{tagline}**. Collecte de l'historique lancée, réessayez dans quelques minutes.")
+            asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+            return
+
+        if player_stats["trend"] > 0:
+            trend = f"📈 +{player_stats['trend']}%"
+        elif player_stats["trend"] < 0:
+            trend = f"📉 {player_stats['trend']}%"
+        else:
+            trend = "➡️ stable"
+
+        embed = Embed(
+            title=f"{gamename_only}#{tagline}",
+            description=f"Statistiques sur les **{player_stats['games']}** dernières parties",
+            color=0x5CDBF0
+        )
+        embed.add_field(name="Winrate", value=f"{player_stats['winrate']}% ({player_stats['wins']}V / {player_stats['games'] - player_stats['wins']}D)", inline=True)
+        embed.add_field(name="KDA", value=f"{player_stats['kda']} ({player_stats['kills']}/{player_stats['deaths']}/{player_stats['assists']})", inline=True)
+        embed.add_field(name="CS/min", value=str(player_stats['cs_per_min']), inline=True)
+        embed.add_field(name="Tendance", value=f"{trend} (récent vs ancien)", inline=True)
+
+        champion_lines = []
+        for champ in player_stats["champions"][:5]:
+            champion_lines.append(f"**{champ['champion']}** • {champ['games']} parties • {champ['winrate']}% • KDA {champ['kda']}")
+        embed.add_field(name="Champions", value="\n".join(champion_lines), inline=False)
+
+        embed.set_footer(text=f"Région: {region.upper()} | Données locales ({stats_index.games_count(puuid)} parties connues)")
+
+        bot_message = await loading_msg.edit(content="", embed=embed)
+        asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+
+    except Exception as e:
+        print(f"Error in stats command: {e}")
+        bot_message = await loading_msg.edit(content=f"Une erreur est survenue: {str(e)}")
+        asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+
+@bot.command(name='leaderboard')
+async def leaderboard(ctx, query: str = "1"):
+    per_page = 10
+
+    if "#" in query:
+        position = ranking_index.position_by_name(query)
+        if position is None:
+            bot_message = await ctx.send(f"**{query}** n'est pas (encore) dans le classement. Seuls les joueurs surveillés avec `!watch` y figurent.")
+            asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+            return
+        page = (position - 1) // per_page + 1
+    else:
+        try:
+            page = int(query)
+        except ValueError:
+            page = 1
+        position = None
+
+    rows, page, pages = ranking_index.page(page, per_page)
+    if not rows:
+        bot_message = await ctx.send("Le classement est vide. Ajoutez des joueurs avec `!watch pseudo#tag`.")
+        asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+        return
+
+    lines = []
+    for pos, entry in rows:
+        if entry["tier"] == "UNRANKED":
+            rank_text = "Non classé"
+        else:
+            rank_text = f"{entry['tier'].title()} {entry['rank']} - {entry['lp']} LP"
+        marker = " ⭐" if pos == position else ""
+        lines.append(f"`#{pos}` **{entry['gamename']}** • {rank_text}{marker}")
+
+    embed = Embed(
+        title="CLASSEMENT DES JOUEURS SURVEILLÉS",
+        description="\n".join(lines),
+        color=0x5CDBF0
+    )
+    embed.set_footer(text=f"Page {page}/{pages} • {len(ranking_index)} joueurs • `!leaderboard <page>` ou `!leaderboard pseudo#tag`")
+
+    bot_message = await ctx.send(embed=embed)
+    asyncio.create_task(delete_messages_after_delay(ctx, bot_message, 3))
+
 @bot.command(name='watch')
 async def watch_player(ctx, *args):
     try:
@@ -778,7 +794,7 @@ async def watch_player(ctx, *args):
         )
         loading_msg = await ctx.send(embed=loading_embed)
 
-        summoner_account = await getSummoner.get_summoner_by_riot_id(gamename_only, tagline)
+        summoner_account = await riot_id_resolver.resolve(gamename_only, tagline, region_mapping[region])
         if "status" in summoner_account:
             embed = Embed(
                 title="JOUEUR INTROUVABLE",
@@ -814,10 +830,14 @@ async def watch_player(ctx, *args):
         }
         
         watched_players[user_id].append(player_data)
+        await asyncio.to_thread(watched_player_manager.add_player, user_id, player_data)
 
         if not game_watcher.is_running():
             game_watcher.start()
 
+        if not leaderboard_refresh.is_running():
+            leaderboard_refresh.start()
+
         embed = Embed(
             title="SURVEILLANCE ACTIVÉE",
             color=0x00ff00
@@ -888,107 +908,269 @@ async def watch_player(ctx, *args):
         asyncio.create_task(delete_messages_after_delay(None, bot_message, 2))
 
 @tasks.loop(minutes=5)
+@timed("loop.game_watcher")
 async def game_watcher():
-    if not any(watched_players.values()):
+    riot_lane.set(BACKGROUND)
+    owned_players = owned_watched_players()
+    if not any(owned_players.values()):
         return
     
-    total_players = sum(len(players) for players in watched_players.values())
+    if worker_hub:
+        players = {p["puuid"]: {"puuid": p["puuid"], "region": p["region"]} for players in owned_players.values() for p in players}
+        await worker_hub.assign_players(list(players.values()))
+        return
+
+    total_players = sum(len(players) for players in owned_players.values())
     print(f"Vérification de {total_players} joueur(s) surveillé(s)...")
+
+    watched_puuids = {p["puuid"] for players in owned_players.values() for p in players}
+    live_games_by_puuid = {}
+    checked = set()
+    lookups = 0
+
+    for user_id, player_list in owned_players.items():
+        for player_info in player_list:
+            try:
+                puuid = player_info["puuid"]
+
+                if puuid in live_games_by_puuid:
+                    live_game = live_games_by_puuid[puuid]
+                elif (puuid, player_info["region"]) in checked:
+                    live_game = {"status": {"status_code": 404, "message": "Joueur non trouvé"}}
+                else:
+                    print(f"Vérification de {player_info['gamename']}...")
+                    live_game = await getSummoner.get_live_game(puuid, player_info["region"])
+                    checked.add((puuid, player_info["region"]))
+                    lookups += 1
+
+                    if "status" not in live_game:
+                        for participant in live_game.get("participants", []):
+                            if participant.get("puuid") in watched_puuids:
+                                live_games_by_puuid[participant["puuid"]] = live_game
+
+                await update_player_status(user_id, player_info, live_game)
+                
+            except Exception as e:
+                print(f"Erreur surveillance {player_info['gamename']}: {e}")
+
+    print(f"{lookups} requête(s) spectator pour {total_players} joueur(s) surveillé(s)")
+
+async def update_player_status(user_id, player_info, live_game):
+    is_in_game = not ("status" in live_game)
+    
+    is_in_watched_game = False
+    if is_in_game:
+        queue_id = live_game.get("gameQueueConfigId", 0)
+        watched_queues = [420, 440, 400, 430]
+        is_in_watched_game = queue_id in watched_queues
     
+    previous_status = player_info["last_status"]
+    track_live_game(player_info["puuid"], live_game.get("gameId") if is_in_game else None)
+    
+    if is_in_watched_game and not previous_status:
+        print(f"PARTIE DÉTECTÉE: {player_info['gamename']} entre en partie!")
+        
+        channel = bot.get_channel(player_info["channel_id"])
+        if channel and await claim_notification(f"game:{player_info['channel_id']}:{player_info['puuid']}:{live_game.get('gameId')}"):
+            await send_modern_notification(channel, player_info, live_game, user_id)
+    elif previous_status and not is_in_watched_game:
+        queue_match_ingestion(player_info["puuid"], player_info["region"], background=True)
+    
+    if is_in_watched_game != previous_status:
+        watched_player_manager.mark_status(user_id, player_info["puuid"], is_in_watched_game)
+    player_info["last_status"] = is_in_watched_game
+
+async def on_worker_live_games(results):
     for user_id, player_list in watched_players.items():
         for player_info in player_list:
+            if player_info["puuid"] not in results:
+                continue
+            live_game = results[player_info["puuid"]] or {"status": {"status_code": 404, "message": "Joueur non trouvé"}}
             try:
-                print(f"Vérification de {player_info['gamename']}...")
-                
-                live_game = await getSummoner.get_live_game(player_info["puuid"], player_info["region"])
-                is_in_game = not ("status" in live_game)
-                
-                is_in_watched_game = False
-                if is_in_game:
-                    queue_id = live_game.get("gameQueueConfigId", 0)
-                    watched_queues = [420, 440, 400, 430]
-                    is_in_watched_game = queue_id in watched_queues
-                
-                previous_status = player_info["last_status"]
-                
-                if is_in_watched_game and not previous_status:
-                    print(f"PARTIE DÉTECTÉE: {player_info['gamename']} entre en partie!")
-                    
-                    channel = bot.get_channel(player_info["channel_id"])
-                    if channel:
-                        await send_modern_notification(channel, player_info, live_game, user_id)
-                
-                player_info["last_status"] = is_in_watched_game
-                
+                await update_player_status(user_id, player_info, live_game)
             except Exception as e:
                 print(f"Erreur surveillance {player_info['gamename']}: {e}")
 
-async def send_modern_notification(channel, player_info, live_game, user_id):
+def queue_match_ingestion(puuid, region, background=False):
+    if puuid in pending_ingestion:
+        return
+    pending_ingestion.add(puuid)
+    match_ingestion_queue.put_nowait((puuid, region, background))
+    if not match_ingestion.is_running():
+        match_ingestion.start()
+
+@timed("matches.ingest")
+async def ingest_player_matches(puuid, region):
+    match_ids = await getSummoner.get_match_history_all_queues(puuid, 0, MATCH_INGESTION_COUNT, region)
+    if not isinstance(match_ids, list):
+        print(f"Historique indisponible pour {puuid[:8]}: {match_ids.get('status', {}).get('message', 'Erreur inconnue')}")
+        return 0
+
+    missing = match_store.missing_matches(match_ids)
+    stored = 0
+    for match_id in missing:
+        match = await getSummoner.get_match(match_id)
+        if "status" in match:
+            print(f"Match {match_id} indisponible: {match['status'].get('message', 'Erreur inconnue')}")
+            continue
+        if match_store.add_match(match):
+            stored += 1
+            if stats_index is not None:
+                stats_index.add_match(match)
+            elif stats_index_task is not None:
+                stats_index_backlog.append(match)
+    return stored
+
+LEADERBOARD_REFRESH_BUDGET = 5
+ranking_index = RankingIndex()
+
+@tasks.loop(seconds=30)
+@timed("loop.leaderboard_refresh")
+async def leaderboard_refresh():
+    riot_lane.set(BACKGROUND)
+    players = {}
+    for player_list in watched_players.values():
+        for player_info in player_list:
+            players.setdefault(player_info["puuid"], player_info)
+
+    for puuid in [p for p in ranking_index.entries if p not in players]:
+        ranking_index.remove(puuid)
+
+    # Chaque instance ne rafraîchit que ses joueurs; les autres rangs arrivent via sync_shared_ranks
+    owned = {puuid: info for puuid, info in players.items() if owns(puuid)}
+    published = {}
+    for puuid in ranking_index.stalest(owned, LEADERBOARD_REFRESH_BUDGET):
+        player_info = owned[puuid]
+        try:
+            league_data = await getSummoner.get_league_by_puuid(puuid, player_info["region"])
+            if "status" in league_data:
+                continue
+            solo_queue = league_cache.remember(puuid, league_data)
+            ranking_index.update(puuid, player_info["gamename"], solo_queue)
+            published[puuid] = {"gamename": player_info["gamename"], "league": solo_queue}
+        except Exception as e:
+            print(f"Erreur classement {player_info['gamename']}: {e}")
+
+    if coordinator is not None and published:
+        try:
+            await asyncio.to_thread(coordinator.publish, "ranks", published)
+        except Exception as e:
+            print(f"Erreur publication classement: {e}")
+
+@tasks.loop(seconds=1)
+async def match_ingestion():
+    riot_lane.set(BACKGROUND)
+    puuid, region, background = await match_ingestion_queue.get()
+    pending_ingestion.discard(puuid)
+    # L'ingestion de fond suit la propriété du joueur (l'anneau a pu changer depuis la mise en file);
+    # les demandes !stats restent locales car la base de matchs est propre à l'instance
+    if background and not owns(puuid):
+        return
     try:
-        participants = live_game.get("participants", [])
-        blue_team = [p for p in participants if p["teamId"] == 100]
-        red_team = [p for p in participants if p["teamId"] == 200]
-        
-        watched_player_data = None
-        for participant in participants:
-            if participant.get("puuid") == player_info["puuid"]:
-                watched_player_data = participant
-                break
-        
-        queue_id = live_game.get("gameQueueConfigId", 0)
-        game_mode = queue_mapping.get(queue_id, "Mode inconnu")
-        duration = round(live_game.get("gameLength", 0) / 60)
-        
-        player_champion = "Inconnu"
-        player_champion_icon = ""
-        if watched_player_data:
-            player_champion_info = await getSummoner.find_champion_by_id(watched_player_data.get("championId", 0))
-            player_champion = player_champion_info["name"]
-            player_champion_icon = player_champion_info["icon_url"]
-        
-        embed = Embed(
-            title="PARTIE DÉTECTÉE !",
-            color=0x00ff41,
-            timestamp=datetime.now()
-        )
-        
-        region_short = reverse_region_mapping.get(player_info['region'], player_info['region']).upper()
-        embed.description = f"**{player_info['gamename']}** joue **{player_champion}** en **{game_mode}**"
-        
-        info_lines = []
-        info_lines.append(f"Durée: {duration} min")
-        info_lines.append(f"Région: {region_short}")
-        info_lines.append(f"Mode: {game_mode}")
-        
-        embed.add_field(name="Infos", value="\n".join(info_lines), inline=True)
-        
-        blue_champs = []
-        red_champs = []
-        
-        for player in blue_team:
-            champion_info = await getSummoner.find_champion_by_id(player.get("championId", 0))
-            marker = " ⭐" if player.get("puuid") == player_info["puuid"] else ""
-            blue_champs.append(f"**{champion_info['name']}**{marker}")
-        
-        for player in red_team:
-            champion_info = await getSummoner.find_champion_by_id(player.get("championId", 0))
-            marker = " ⭐" if player.get("puuid") == player_info["puuid"] else ""
-            red_champs.append(f"**{champion_info['name']}**{marker}")
-        
-        teams_display = f"🔴 {' • '.join(red_champs)}\n\n⚡ **VS** ⚡\n\n🔵 {' • '.join(blue_champs)}"
-        embed.add_field(name="Équipes", value=teams_display, inline=False)
-        
-        if player_info.get("stream_url"):
-            embed.add_field(
-                name="Stream",
-                value=f"[Regarder maintenant]({player_info['stream_url']})",
-                inline=True
+        stored = await ingest_player_matches(puuid, region)
+        print(f"Ingestion matchs {puuid[:8]}: {stored} nouveau(x) match(s), {match_store.count()} en base")
+    except Exception as e:
+        print(f"Erreur ingestion matchs {puuid[:8]}: {e}")
+
+RANK_DEADLINE_SECONDS = 2
+RANK_LATE_TIMEOUT_SECONDS = 30
+LIVE_GAME_MAX_AGE = 3 * 3600
+league_cache = LeagueCache(getSummoner)
+live_games = {}
+live_game_by_puuid = {}
+
+async def get_live_game_entry(live_game, region):
+    game_id = live_game.get("gameId")
+    entry = live_games.get(game_id)
+    if entry:
+        return entry
+
+    participants = live_game.get("participants", [])
+    # Rangs lancés avant la résolution des champions pour que les deux se recouvrent
+    rank_lookups = league_cache.lookup_many([p.get("puuid") for p in participants], region)
+    champions = {}
+    teams = {100: [], 200: []}
+    for player in participants:
+        champion_info = await getSummoner.find_champion_by_id(player.get("championId", 0))
+        champions[player.get("puuid")] = champion_info
+        teams.setdefault(player["teamId"], []).append((champion_info['name'], player.get("puuid")))
+
+    queue_id = live_game.get("gameQueueConfigId", 0)
+    entry = {
+        "game_id": game_id,
+        "cached_at": time.time(),
+        "game_length": live_game.get("gameLength", 0),
+        "game_mode": queue_mapping.get(queue_id, "Mode inconnu"),
+        "region_short": reverse_region_mapping.get(region, region).upper(),
+        "champions": champions,
+        "red_team": teams[200],
+        "blue_team": teams[100],
+        "region": region,
+        "rank_lookups": rank_lookups,
+        "ranks": {},
+        "rank_task": None,
+        "teams_display": {},
+        "messages": [],
+    }
+    entry["ranks"] = await league_cache.wait_ranks(entry["rank_lookups"], RANK_DEADLINE_SECONDS)
+    live_games[game_id] = entry
+    return entry
+
+def track_live_game(puuid, game_id):
+    previous = live_game_by_puuid.get(puuid)
+    if previous == game_id:
+        return
+    if previous is not None:
+        del live_game_by_puuid[puuid]
+        if previous in live_games and previous not in live_game_by_puuid.values():
+            del live_games[previous]
+            print(f"Partie {previous} terminée, retirée du cache")
+    if game_id is not None:
+        live_game_by_puuid[puuid] = game_id
+
+    now = time.time()
+    for stale_id in [g for g, e in live_games.items() if now - e["cached_at"] > LIVE_GAME_MAX_AGE]:
+        del live_games[stale_id]
+
+def render_live_game_embed(entry, player_info):
+    ranks = entry["ranks"]
+    # Seules les équipes sont mémorisées: la durée doit rester à jour pour les abonnés notifiés plus tard
+    key = (player_info["puuid"], len(ranks))
+    with timer("embeds.live_game"):
+        teams_display = entry["teams_display"].get(key)
+        if teams_display is None:
+            teams_display = entry["teams_display"][key] = render_teams(
+                *(tuple((name, puuid == player_info["puuid"], format_rank_short(ranks[puuid]) if puuid in ranks else None) for name, puuid in team)
+                  for team in (entry["red_team"], entry["blue_team"]))
             )
-        
-        if player_champion_icon:
-            embed.set_thumbnail(url=player_champion_icon)
-        
-        embed.set_footer(text="GL HF ! • Message supprimé dans 25 min")
+        champion_info = entry["champions"].get(player_info["puuid"])
+        duration = round((entry["game_length"] + time.time() - entry["cached_at"]) / 60)
+        embed = live_game_embed(
+            player_info['gamename'], champion_info["name"] if champion_info else "Inconnu", entry["game_mode"], duration,
+            entry["region_short"], teams_display, player_info.get("stream_url"), champion_info["icon_url"] if champion_info else ""
+        )
+    return embed
+
+async def complete_live_game_ranks(entry):
+    # Les rangs en erreur ne sont pas affichés comme NC: une seconde tentative avant d'abandonner
+    league_cache.retry_failed(entry["rank_lookups"], entry["region"])
+    entry["ranks"] = await league_cache.wait_ranks(entry["rank_lookups"], RANK_LATE_TIMEOUT_SECONDS)
+    if league_cache.retry_failed(entry["rank_lookups"], entry["region"]):
+        entry["ranks"] = await league_cache.wait_ranks(entry["rank_lookups"], RANK_LATE_TIMEOUT_SECONDS)
+    for message, player_info in entry["messages"]:
+        try:
+            with timer("discord.edit_live_game"):
+                await message.edit(embed=render_live_game_embed(entry, player_info))
+        except Exception as e:
+            print(f"Erreur mise à jour des rangs: {e}")
+    print(f"Rangs complétés pour la partie {entry['game_id']}: {len(entry['ranks'])}/{len(entry['rank_lookups'])}")
+
+async def send_modern_notification(channel, player_info, live_game, user_id):
+    try:
+        entry = await get_live_game_entry(live_game, player_info['region'])
+        track_live_game(player_info["puuid"], entry["game_id"])
+        entry["ranks"] = await league_cache.wait_ranks(entry["rank_lookups"], 0)
+        embed = render_live_game_embed(entry, player_info)
         
         ping_content = ""
         if player_info.get("ping_role_id"):
@@ -1002,9 +1184,15 @@ async def send_modern_notification(channel, player_info, live_game, user_id):
         if not ping_content:
             ping_content = f"<@{user_id}>"
         
-        notification_msg = await channel.send(ping_content, embed=embed)
+        with timer("discord.send_live_game"):
+            notification_msg = await channel.send(ping_content, embed=embed)
         print(f"Notification envoyée pour {player_info['gamename']}")
         
+        notification_msg = message_handle(notification_msg)
+        entry["messages"].append((notification_msg, player_info))
+        if (entry["rank_task"] is None or entry["rank_task"].done()) and len(entry["ranks"]) < len(entry["rank_lookups"]):
+            entry["rank_task"] = asyncio.create_task(complete_live_game_ranks(entry))
+        
         asyncio.create_task(delete_message_after_delay(notification_msg, 25))
         
     except Exception as e:
@@ -1024,12 +1212,24 @@ async def help_command(ctx):
         inline=False
     )
     
+    embed.add_field(
+        name="**!stats** `<pseudo#tag>` `[region]` `[nombre]`",
+        value="Winrate par champion, KDA, CS/min et tendance sur les N dernières parties\n**Exemple:** `!stats Faker#KR1 kr 50`",
+        inline=False
+    )
+    
     embed.add_field(
         name="**!watch** `<pseudo#tag>` `[region]` `[@role]` `[url]`",
         value="Surveille un joueur (max 15) et notifie ses parties\n**Exemple:** `!watch Faker#KR1 kr @Streamers https://twitch.tv/faker`",
         inline=False
     )
     
+    embed.add_field(
+        name="**!leaderboard** `[page|pseudo#tag]`",
+        value="Classement des joueurs surveillés par rang (tier/division/LP)\n**Exemple:** `!leaderboard 2` ou `!leaderboard Faker#KR1`",
+        inline=False
+    )
+    
     embed.add_field(
         name="**!watchlist**",
         value="Affiche tous vos joueurs surveillés avec détails",
@@ -1088,6 +1288,8 @@ async def help_command_alpine(interaction: discord.Interaction):
     
     lol_commands = """
 `!profile <pseudo#tag> [region]` - Profil d'un joueur LoL
+`!stats <pseudo#tag> [region] [nombre]` - Statistiques sur les dernières parties
+`!leaderboard [page|pseudo#tag]` - Classement des joueurs surveillés
 `!watch <pseudo#tag> [region] [@role] [url]` - Surveiller un joueur
 `!watchlist` - Voir vos joueurs surveillés
 `!unwatch [joueur|all]` - Arrêter de surveiller
@@ -1105,77 +1307,192 @@ async def help_command_alpine(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed)
 
+startup_manager = StartupManager()
+
+async def hydrate_streams():
+    if snapshot_info["clean"]:
+        print(f"Streams repris du snapshot: {sum(len(ids) for ids in streamers.values())} entrées")
+        return
+    all_streams = await asyncio.to_thread(stream_manager.get_all_streams)
+
+    # Migration: les anciennes entrées ne connaissent que le login, on résout leur user_id par lots
+    unmigrated = sorted({s['username'] for s in all_streams if not s.get('user_id')})
+    if unmigrated:
+        user_ids = await twitch_user_resolver.resolve_logins(unmigrated)
+        await asyncio.to_thread(stream_manager.set_user_ids, user_ids)
+        for s in all_streams:
+            s['user_id'] = s.get('user_id') or user_ids.get(s['username'])
+        print(f"Migration user_id: {len(user_ids)}/{len(unmigrated)} login(s) résolu(s)")
+
+    for s in all_streams:
+        if not s.get('user_id') and twitch_api.token:
+            print(f"Streamer {s['username']} introuvable sur Twitch, ignoré")
+    set_streamers(all_streams)
+    print(f"Streams hydratés depuis {stream_manager.backend()}: {len(all_streams)} entrées")
+
+def set_streamers(all_streams):
+    streamers.clear()
+    for s in all_streams:
+        if not s.get('user_id'):
+            continue
+        cid = int(s['channel_id'])
+        user_id = int(s['user_id'])
+        if user_id not in twitch_user_resolver.by_id:
+            twitch_user_resolver.remember(user_id, s['username'])
+        streamers.setdefault(cid, [])
+        if user_id not in streamers[cid]:
+            streamers[cid].append(user_id)
+
+async def hydrate_stream_state():
+    if snapshot_info["clean"]:
+        return
+    messages, roles = await asyncio.to_thread(stream_state_manager.load_all)
+    stream_messages.update({k: v for k, v in messages.items() if k not in stream_messages})
+    await migrate_legacy_stream_keys()
+    for channel_id, role_id in roles.items():
+        ping_roles.setdefault(channel_id, role_id)
+    print(f"État des streams hydraté: {len(messages)} message(s) live, {len(roles)} rôle(s) de ping")
+
+unresolved_stream_keys = set()
+
+async def migrate_legacy_stream_keys():
+    # Anciennes clés "salon_login" passées à l'user_id; celles que Twitch ne résout pas encore (token absent,
+    # erreur API) restent en place et sont retentées à chaque passage de check_streams
+    legacy = [k for k in stream_messages if not k.split('_', 1)[1].isdigit()]
+    if not legacy:
+        return
+    resolved = {}
+    if twitch_api.token:
+        try:
+            resolved = await twitch_user_resolver.resolve_logins([k.split('_', 1)[1] for k in legacy])
+        except Exception as e:
+            print(f"Erreur résolution des logins Twitch: {e}")
+    for key in legacy:
+        channel_id, login = key.split('_', 1)
+        user_id = resolved.get(twitch_user_resolver.normalize(login)) or twitch_user_resolver.by_login.get(login)
+        if user_id is None:
+            if key not in unresolved_stream_keys:
+                unresolved_stream_keys.add(key)
+                print(f"Message live {key}: login Twitch non résolu, nouvel essai au prochain passage")
+            continue
+        unresolved_stream_keys.discard(key)
+        new_key = f"{channel_id}_{user_id}"
+        entry = stream_messages.pop(key)
+        stream_messages.setdefault(new_key, entry)
+        stream_state_manager.forget_message(key)
+        stream_state_manager.mark_message(new_key, stream_messages[new_key])
+        print(f"Message live {key} migré vers {new_key}")
+
+async def hydrate_watched_players():
+    if not watched_players:
+        watched_players.update(await asyncio.to_thread(watched_player_manager.load_all))
+        print(f"Joueurs surveillés hydratés: {sum(len(p) for p in watched_players.values())} entrées")
+
+def open_storage():
+    # Les constructeurs (import psycopg2, connexion, CREATE TABLE) tournent ici, dans un thread: un simple
+    # asyncio.to_thread(manager.methode) résoudrait l'attribut, donc le LazyInstance, sur la boucle
+    for manager in (stream_manager, watched_player_manager, stream_state_manager, event_manager):
+        manager.resolve()
+
+async def hydrate_events():
+    if snapshot_info["clean"]:
+        return
+    stored = await asyncio.to_thread(event_manager.load_all)
+    if stored is not None:
+        apply_stored_events(stored)
+        print(f"Événements hydratés: {len(stored)} entrée(s)")
+
+async def warm_twitch_token():
+    print("Initialisation de l'API Twitch...")
+    await twitch_api.get_token()
+    if twitch_api.token:
+        print("Token Twitch obtenu avec succès!")
+    else:
+        print("Impossible d'obtenir le token Twitch")
+
+async def start_workers():
+    worker_hub.on_live_games = on_worker_live_games
+    worker_hub.on_streams = on_worker_streams
+    # La réserve interactive reste calculée sur le budget complet de la clé
+    getSummoner.set_rate_share(worker_hub.gateway_share, INTERACTIVE_SHARE / worker_hub.gateway_share)
+    await worker_hub.start()
+
+async def start_loop(loop, label):
+    if not loop.is_running():
+        loop.start()
+        print(f"{label} démarré!")
+    else:
+        print(f"{label} déjà en cours d'exécution")
+
+async def start_lol_loops():
+    await start_loop(watched_status_flush, "Sauvegarde des statuts LoL")
+    if any(watched_players.values()):
+        await start_loop(game_watcher, "LoL watcher")
+        await start_loop(leaderboard_refresh, "Classement LoL")
+
 @bot.event
 async def on_ready():
     print(f"Connecté en tant que {bot.user}")
     print(f"ID du bot: {bot.user.id}")
     print(f"Connecté à {len(bot.guilds)} serveur(s)")
     
+    if startup_manager.started:
+        print("Reconnexion: initialisation déjà effectuée, rien à relancer")
+        return
+    startup_manager.started = True
+    enable_slow_callback_detection()
+    loop_monitor.start()
+    
     try:
-        all_streams = stream_manager.get_all_streams()
-        global streamers
-        streamers.clear()
-        for s in all_streams:
-            cid = int(s['channel_id'])
-            streamers.setdefault(cid, [])
-            if s['username'] not in streamers[cid]:
-                streamers[cid].append(s['username'])
-        print(f"Streams hydratés depuis {stream_manager.backend()}: {len(all_streams)} entrées")
-
-        await asyncio.sleep(2)
-        
         print(f"Commandes enregistrées dans le bot:")
         for cmd in bot.tree.get_commands():
             print(f"  - {cmd.name}: {cmd.description}")
         
-        print(f"Synchronisation des commandes avec Discord...")
-        
-        synced_global = await bot.tree.sync()
-        print(f'{len(synced_global)} commandes synchronisées globalement!')
-        
-        print(f"Commandes synchronisées:")
-        for cmd in synced_global:
-            print(f"  - /{cmd.name}")
-        
-        print("Initialisation de l'API Twitch...")
-        await twitch_api.get_token()
-        if twitch_api.token:
-            print("Token Twitch obtenu avec succès!")
-        else:
-            print("Impossible d'obtenir le token Twitch")
-        
-        if not check_streams.is_running():
-            check_streams.start()
-            print("Système de vérification Twitch démarré! (toutes les 2 minutes)")
-        else:
-            print("Système Twitch déjà en cours d'exécution")
-        
-        if not notification_system.is_running():
-            notification_system.start()
-            print("Système de notifications démarré!")
-        else:
-            print("Système de notifications déjà en cours d'exécution")
+        stage = startup_manager.stage
+        coordination_dependencies = []
+        if COORDINATION:
+            stage("coordination", start_coordination)
+            coordination_dependencies.append("coordination")
+        stage("restauration_snapshot", restore_snapshot)
+        stage("ouverture_stockage", lambda: asyncio.to_thread(open_storage))
+        stage("token_twitch", warm_twitch_token)
+        stage("hydratation_streams", hydrate_streams, after=["token_twitch", "restauration_snapshot", "ouverture_stockage"])
+        stage("hydratation_etat_streams", hydrate_stream_state, after=["hydratation_streams"])
+        stage("hydratation_joueurs", hydrate_watched_players, after=["restauration_snapshot", "ouverture_stockage"])
+        stage("hydratation_evenements", hydrate_events, after=["restauration_snapshot", "ouverture_stockage"])
+        stage("boucle_snapshot", lambda: start_loop(state_snapshot, "Snapshot d'état périodique"),
+              after=["hydratation_etat_streams", "hydratation_joueurs", "hydratation_evenements"])
+        stage("data_dragon", getSummoner.get_champion_data)
+        stage("sync_commandes", lambda: sync_command_tree(bot.tree))
+        stage("boucle_notifications", lambda: start_loop(notification_system, "Système de notifications"),
+              after=["hydratation_evenements"] + coordination_dependencies)
+        
+        twitch_dependencies = ["hydratation_streams", "hydratation_etat_streams", "token_twitch"] + coordination_dependencies
+        if worker_hub and not worker_hub.server:
+            stage("workers", start_workers)
+            twitch_dependencies.append("workers")
+        stage("boucle_twitch", lambda: start_loop(check_streams, "Système de vérification Twitch (toutes les 2 minutes)"), after=twitch_dependencies)
+        stage("boucles_lol", start_lol_loops, after=["hydratation_joueurs", "data_dragon"] + coordination_dependencies)
         
         port_env = os.getenv("PORT")
         if port_env:
             print(f"Démarrage du serveur web sur le port {port_env}...")
-            success = await start_web_server()
-            if success:
-                print("Serveur web démarré avec succès!")
-            else:
-                print("ÉCHEC du démarrage du serveur web!")
+            stage("serveur_web", start_web_server)
         else:
             print("Variable PORT non définie, serveur web non démarré")
+        
+        await startup_manager.wait()
             
         print("Bot complètement initialisé et prêt!")
         print("="*50)
         print("RÉSUMÉ DE L'INITIALISATION:")
         print(f"  Bot connecté: OK")
-        print(f"  Commandes sync: OK ({len(synced_global)})")
+        print(f"  Commandes sync: {'KO' if 'sync_commandes' in startup_manager.errors else 'OK'}")
         print(f"  Système Twitch: {'OK' if check_streams.is_running() else 'KO'}")
         print(f"  Notifications: {'OK' if notification_system.is_running() else 'KO'}")
         print(f"  Serveur web: {'OK' if web_runner is not None else 'KO'}")
         print(f"  Token Twitch: {'OK' if twitch_api.token else 'KO'}")
+        print(startup_manager.report())
         print("="*50)
             
     except Exception as e:
@@ -1250,7 +1567,41 @@ async def shutdown_bot():
         if game_watcher.is_running():
             game_watcher.cancel()
             print("Système LoL watcher arrêté")
-        
+
+        if match_ingestion.is_running():
+            match_ingestion.cancel()
+            print("Ingestion des matchs arrêtée")
+
+        if leaderboard_refresh.is_running():
+            leaderboard_refresh.cancel()
+            print("Classement arrêté")
+
+        if watched_status_flush.is_running():
+            watched_status_flush.cancel()
+        await asyncio.to_thread(watched_player_manager.flush)
+        print("Statuts des joueurs surveillés sauvegardés")
+        await asyncio.to_thread(stream_state_manager.flush)
+        print("Messages live et rôles de ping sauvegardés")
+
+        if state_snapshot.is_running():
+            state_snapshot.cancel()
+        size = await save_snapshot(clean=True)
+        print(f"Snapshot d'état écrit ({size // 1024}Ko)")
+        
+        if worker_hub:
+            await worker_hub.stop()
+            print("Workers de polling arrêtés")
+        
+        if coordinator:
+            if coordination_heartbeat.is_running():
+                coordination_heartbeat.cancel()
+            await asyncio.to_thread(coordinator.release)
+            print("Baux de coordination libérés")
+
+        loop_monitor.stop()
+        await getSummoner.close()
+        if traffic.recorder:
+            traffic.recorder.close()
         await stop_web_server()
         await bot.close()
         print("Bot fermé proprement")
@@ -1272,44 +1623,15 @@ async def on_message(ctx):
         return
     await bot.process_commands(ctx)
 
-if __name__ == '__main__':
-    token = os.getenv("DISCORD_TOKEN")
-    if not token:
-        print("DISCORD_TOKEN manquant dans les variables d'environnement!")
-        print("Assurez-vous que la variable DISCORD_TOKEN est définie")
-        exit(1)
-    
-    print("Démarrage du Bot Alpine Unifié...")
-    print(f"Variables d'environnement:")
-    print(f"  - DISCORD_TOKEN: {'Défini' if token else 'Manquant'}")
-    print(f"  - TWITCH_CLIENT_ID: {'Défini' if os.getenv('TWITCH_CLIENT_ID') else 'Manquant'}")
-    print(f"  - TWITCH_CLIENT_SECRET: {'Défini' if os.getenv('TWITCH_CLIENT_SECRET') else 'Manquant'}")
-    print(f"  - RIOT_API_KEY: {'Défini' if os.getenv('RIOT_API_KEY') else 'Manquant'}")
-    print(f"  - PORT: {os.getenv('PORT') if os.getenv('PORT') else 'Non défini'}")
-    print("-" * 50)
-    
+async def stop_web_server():
+    global web_runner, web_site
     try:
-        bot.run(token)
-    except KeyboardInterrupt:
-        print("\nArrêt manuel détecté...")
-    except Exception as e:
-        print(f"ERREUR CRITIQUE lors du démarrage du bot: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        print("Bot arrêté!")
-        print(f"Erreur serveur web: {e}")
-        return False
-
-async def stop_web_server():
-    global web_runner, web_site
-    try:
-        if web_site:
-            await web_site.stop()
-            web_site = None
-        if web_runner:
-            await web_runner.cleanup()
-            web_runner = None
+        if web_site:
+            await web_site.stop()
+            web_site = None
+        if web_runner:
+            await web_runner.cleanup()
+            web_runner = None
     except Exception as e:
         print(f"Erreur arrêt serveur: {e}")
 
@@ -1317,6 +1639,7 @@ class StreamManager:
     def __init__(self):
         self.db_url = os.environ.get('DATABASE_URL')
         if self.db_url:
+            self.pg = load_psycopg2()
             self.init_database()
         else:
             print("DATABASE_URL non trouvée, utilisation du fichier JSON")
@@ -1328,7 +1651,7 @@ class StreamManager:
 
     def init_database(self):
         try:
-            conn = psycopg2.connect(self.db_url)
+            conn = self.pg.connect(self.db_url)
             cur = conn.cursor()
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS streams (
@@ -1340,6 +1663,8 @@ class StreamManager:
                     UNIQUE(username, guild_id, channel_id)
                 )
             """)
+            cur.execute("ALTER TABLE streams ADD COLUMN IF NOT EXISTS user_id BIGINT")
+            cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS streams_user_id_channel ON streams (user_id, guild_id, channel_id)")
             conn.commit()
             cur.close()
             conn.close()
@@ -1348,9 +1673,10 @@ class StreamManager:
             print(f"Erreur base de données: {e}")
 
     def _db(self):
-        return psycopg2.connect(self.db_url, cursor_factory=RealDictCursor)
+        return self.pg.connect(self.db_url, cursor_factory=self.pg.extras.RealDictCursor)
 
-    def add_stream(self, username, guild_id, channel_id):
+    @timed("streams.add_stream")
+    def add_stream(self, username, guild_id, channel_id, user_id=None):
         username = username.lower().replace('@','').strip()
         if not username:
             return False, "Nom d'utilisateur invalide"
@@ -1359,20 +1685,21 @@ class StreamManager:
                 conn = self._db()
                 cur = conn.cursor()
                 cur.execute(
-                    "INSERT INTO streams (username, guild_id, channel_id) VALUES (%s, %s, %s)",
-                    (username, str(guild_id), str(channel_id))
+                    "INSERT INTO streams (username, guild_id, channel_id, user_id) VALUES (%s, %s, %s, %s)",
+                    (username, str(guild_id), str(channel_id), user_id)
                 )
                 conn.commit()
                 cur.close(); conn.close()
                 return True, "Stream ajouté avec succès"
-            except psycopg2.IntegrityError:
+            except self.pg.IntegrityError:
                 return False, "Stream déjà présent"
             except Exception as e:
                 print("Erreur ajout stream:", e)
                 return False, "Erreur lors de l'ajout"
         else:
-            return self._add_stream_json(username, guild_id, channel_id)
+            return self._add_stream_json(username, guild_id, channel_id, user_id)
 
+    @timed("streams.remove_stream")
     def remove_stream(self, username, guild_id, channel_id):
         username = username.lower().replace('@','').strip()
         if self.db_url:
@@ -1395,6 +1722,7 @@ class StreamManager:
         else:
             return self._remove_stream_json(username, guild_id, channel_id)
 
+    @timed("streams.clear_channel")
     def clear_channel(self, guild_id, channel_id):
         if self.db_url:
             try:
@@ -1415,6 +1743,7 @@ class StreamManager:
             self._save_streams_json()
             return before - len(self._streams_cache)
 
+    @timed("streams.get_streams_for_channel")
     def get_streams_for_channel(self, guild_id, channel_id):
         if self.db_url:
             try:
@@ -1433,21 +1762,52 @@ class StreamManager:
         else:
             return [s['username'] for s in self._streams_cache if s['guild_id']==str(guild_id) and s['channel_id']==str(channel_id)]
 
-    def get_all_streams(self):
+    @timed("streams.get_all_streams")
+    def get_all_streams(self, strict=False):
         if self.db_url:
             try:
                 conn = self._db()
                 cur = conn.cursor()
-                cur.execute("SELECT username, guild_id, channel_id FROM streams")
+                cur.execute("SELECT username, user_id, guild_id, channel_id FROM streams")
                 rows = cur.fetchall()
                 cur.close(); conn.close()
                 return [dict(r) for r in rows]
             except Exception as e:
+                if strict:
+                    raise
                 print("Erreur get_all_streams:", e)
                 return []
         else:
             return list(self._streams_cache)
 
+    @timed("streams.set_user_ids")
+    def set_user_ids(self, user_ids):
+        if not user_ids:
+            return 0
+        if self.db_url:
+            try:
+                conn = self._db()
+                cur = conn.cursor()
+                self.pg.extras.execute_batch(
+                    cur,
+                    "UPDATE streams SET user_id=%s WHERE username=%s AND user_id IS NULL",
+                    [(user_id, username) for username, user_id in user_ids.items()]
+                )
+                conn.commit()
+                cur.close(); conn.close()
+                return len(user_ids)
+            except Exception as e:
+                print("Erreur migration user_id:", e)
+                return 0
+        else:
+            self._ensure_json_loaded()
+            for s in self._streams_cache:
+                if not s.get('user_id') and s['username'] in user_ids:
+                    s['user_id'] = user_ids[s['username']]
+            self._save_streams_json()
+            return len(user_ids)
+
+    @timed("streams.get_total_count")
     def get_total_count(self):
         if self.db_url:
             try:
@@ -1475,9 +1835,8 @@ class StreamManager:
         self._ensure_json_loaded()
         try:
             if os.path.exists(self.streams_file):
-                with open(self.streams_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self._streams_cache = data.get('streams', [])
+                data = codec.load_file(self.streams_file)
+                self._streams_cache = data.get('streams', [])
             else:
                 self._streams_cache = []
         except Exception as e:
@@ -1488,20 +1847,20 @@ class StreamManager:
         self._ensure_json_loaded()
         try:
             data = {'streams': self._streams_cache, 'last_updated': datetime.now().isoformat()}
-            with open(self.streams_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            codec.dump_file(data, self.streams_file)
             return True
         except Exception as e:
             print('Erreur sauvegarde JSON:', e)
             return False
 
-    def _add_stream_json(self, username, guild_id, channel_id):
+    def _add_stream_json(self, username, guild_id, channel_id, user_id=None):
         self._ensure_json_loaded()
         for s in self._streams_cache:
-            if s['username']==username and s['guild_id']==str(guild_id) and s['channel_id']==str(channel_id):
+            if (s['username']==username or (user_id and s.get('user_id')==user_id)) and s['guild_id']==str(guild_id) and s['channel_id']==str(channel_id):
                 return False, "Stream déjà présent"
         self._streams_cache.append({
             'username': username,
+            'user_id': user_id,
             'guild_id': str(guild_id),
             'channel_id': str(channel_id),
             'added_at': datetime.now().isoformat()
@@ -1518,195 +1877,672 @@ class StreamManager:
             return True, "Stream supprimé"
         return False, "Stream non trouvé"
 
-stream_manager = StreamManager()
+stream_manager = LazyInstance(StreamManager)
 
-TWITCH_CLIENT_ID = os.getenv("TWITCH_CLIENT_ID")
-TWITCH_CLIENT_SECRET = os.getenv("TWITCH_CLIENT_SECRET")
-streamers = {}
-stream_messages = {}
-currently_live_streamers = {}
-ping_roles = {}
-reaction_role_messages = {}
-
-class TwitchAPI:
+class WatchedPlayerManager:
     def __init__(self):
-        self.token = None
-        self.headers = {}
-        self.token_expires_at = None
+        self.db_url = os.environ.get('DATABASE_URL')
+        self._pending_status = {}
+        # add_player et flush tournent dans des threads (asyncio.to_thread): écritures sérialisées
+        self._lock = threading.Lock()
+        if self.db_url:
+            self.pg = load_psycopg2()
+            self.init_database()
+        else:
+            self.data_dir = 'data'
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.players_file = os.path.join(self.data_dir, 'watched_players.json')
+            self._players_cache = []
+            self._load_players_json()
 
-    async def get_token(self):
-        if not TWITCH_CLIENT_ID or not TWITCH_CLIENT_SECRET:
-            print("Variables Twitch manquantes, fonctionnalités Twitch désactivées")
-            return
-        url = "https://id.twitch.tv/oauth2/token"
-        params = {
-            'client_id': TWITCH_CLIENT_ID,
-            'client_secret': TWITCH_CLIENT_SECRET,
-            'grant_type': 'client_credentials'
+    def init_database(self):
+        try:
+            conn = self.pg.connect(self.db_url)
+            cur = conn.cursor()
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS watched_players (
+                    user_id TEXT NOT NULL,
+                    puuid TEXT NOT NULL,
+                    gamename TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    last_status BOOLEAN NOT NULL DEFAULT FALSE,
+                    ping_role_id TEXT,
+                    stream_url TEXT,
+                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, puuid)
+                )
+            """)
+            conn.commit()
+            cur.close()
+            conn.close()
+        except Exception as e:
+            print(f"Erreur base de données (watched_players): {e}")
+
+    def _db(self):
+        return self.pg.connect(self.db_url, cursor_factory=self.pg.extras.RealDictCursor)
+
+    def load_all(self, strict=False):
+        if self.db_url:
+            try:
+                conn = self._db()
+                cur = conn.cursor()
+                cur.execute("SELECT user_id, puuid, gamename, region, channel_id, last_status, ping_role_id, stream_url FROM watched_players ORDER BY added_at")
+                rows = [dict(r) for r in cur.fetchall()]
+                cur.close(); conn.close()
+            except Exception as e:
+                if strict:
+                    raise
+                print("Erreur chargement watched_players:", e)
+                return {}
+        else:
+            rows = self._players_cache
+
+        players = {}
+        for r in rows:
+            players.setdefault(int(r['user_id']), []).append({
+                "gamename": r['gamename'],
+                "puuid": r['puuid'],
+                "region": r['region'],
+                "channel_id": int(r['channel_id']),
+                "last_status": bool(r['last_status']),
+                "ping_role_id": int(r['ping_role_id']) if r.get('ping_role_id') else None,
+                "stream_url": r.get('stream_url')
+            })
+        return players
+
+    def add_player(self, user_id, player_data):
+        with self._lock:
+            return self._add_player(user_id, player_data)
+
+    def _add_player(self, user_id, player_data):
+        row = {
+            'user_id': str(user_id),
+            'puuid': player_data['puuid'],
+            'gamename': player_data['gamename'],
+            'region': player_data['region'],
+            'channel_id': str(player_data['channel_id']),
+            'last_status': bool(player_data['last_status']),
+            'ping_role_id': str(player_data['ping_role_id']) if player_data.get('ping_role_id') else None,
+            'stream_url': player_data.get('stream_url')
         }
+        if self.db_url:
+            try:
+                conn = self._db()
+                cur = conn.cursor()
+                cur.execute("""
+                    INSERT INTO watched_players (user_id, puuid, gamename, region, channel_id, last_status, ping_role_id, stream_url)
+                    VALUES (%(user_id)s, %(puuid)s, %(gamename)s, %(region)s, %(channel_id)s, %(last_status)s, %(ping_role_id)s, %(stream_url)s)
+                    ON CONFLICT (user_id, puuid) DO NOTHING
+                """, row)
+                conn.commit()
+                cur.close(); conn.close()
+                return True
+            except Exception as e:
+                print("Erreur ajout watched_player:", e)
+                return False
+        else:
+            self._players_cache.append(row)
+            return self._save_players_json()
+
+    def mark_status(self, user_id, puuid, last_status):
+        self._pending_status[(str(user_id), puuid)] = bool(last_status)
+
+    def flush(self):
+        with self._lock:
+            return self._flush()
+
+    def _flush(self):
+        if not self._pending_status:
+            return 0
+        pending = self._pending_status
+        self._pending_status = {}
+        if self.db_url:
+            try:
+                conn = self._db()
+                cur = conn.cursor()
+                self.pg.extras.execute_batch(
+                    cur,
+                    "UPDATE watched_players SET last_status=%s WHERE user_id=%s AND puuid=%s",
+                    [(status, user_id, puuid) for (user_id, puuid), status in pending.items()]
+                )
+                conn.commit()
+                cur.close(); conn.close()
+            except Exception as e:
+                print("Erreur flush watched_players:", e)
+                # Remise en file sans écraser les statuts marqués depuis par la boucle
+                for key, status in pending.items():
+                    self._pending_status.setdefault(key, status)
+                return 0
+        else:
+            for r in self._players_cache:
+                key = (r['user_id'], r['puuid'])
+                if key in pending:
+                    r['last_status'] = pending[key]
+            self._save_players_json()
+        return len(pending)
+
+    def _load_players_json(self):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, params=params) as resp:
-                    data = await resp.json()
-                    self.token = data['access_token']
-                    self.token_expires_at = datetime.now(UTC).timestamp() + data['expires_in']
-                    self.headers = {
-                        'Client-ID': TWITCH_CLIENT_ID,
-                        'Authorization': f'Bearer {self.token}'
-                    }
+            if os.path.exists(self.players_file):
+                self._players_cache = codec.load_file(self.players_file).get('players', [])
         except Exception as e:
-            print(f"Erreur Twitch API: {e}")
-
-    async def ensure_valid_token(self):
-        if not self.token or datetime.now(UTC).timestamp() >= self.token_expires_at - 300:
-            await self.get_token()
-
-    async def get_streams(self, usernames):
-        if not self.token:
-            return []
-        await self.ensure_valid_token()
-        url = "https://api.twitch.tv/helix/streams"
-        all_streams = []
-        for i in range(0, len(usernames), 100):
-            batch = usernames[i:i+100]
-            params = {'user_login': batch}
+            print("Erreur chargement JSON watched_players:", e)
+            self._players_cache = []
+
+    def _save_players_json(self):
+        try:
+            data = {'players': self._players_cache, 'last_updated': datetime.now().isoformat()}
+            codec.dump_file(data, self.players_file)
+            return True
+        except Exception as e:
+            print('Erreur sauvegarde JSON watched_players:', e)
+            return False
+
+watched_player_manager = LazyInstance(WatchedPlayerManager)
+
+class StreamStateManager:
+    def __init__(self):
+        self.db_url = os.environ.get('DATABASE_URL')
+        self._pending_messages = {}
+        self._pending_roles = {}
+        # flush passe par asyncio.to_thread depuis plusieurs tâches: fichier .tmp et cache partagés
+        self._lock = threading.Lock()
+        if self.db_url:
+            self.pg = load_psycopg2()
+            self.init_database()
+        else:
+            self.data_dir = 'data'
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.state_file = os.path.join(self.data_dir, 'stream_state.json')
+            self._state_cache = {'messages': {}, 'ping_roles': {}}
+            self._load_state_json()
+
+    def init_database(self):
+        try:
+            conn = self.pg.connect(self.db_url)
+            cur = conn.cursor()
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS stream_messages (
+                    channel_id TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    message_id TEXT NOT NULL,
+                    last_update DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (channel_id, username)
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS ping_roles (
+                    channel_id TEXT PRIMARY KEY,
+                    role_id TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+            cur.close()
+            conn.close()
+        except Exception as e:
+            print(f"Erreur base de données (stream_messages): {e}")
+
+    def load_all(self, strict=False):
+        if self.db_url:
+            try:
+                conn = self.pg.connect(self.db_url)
+                cur = conn.cursor()
+                cur.execute("SELECT channel_id, username, message_id, last_update FROM stream_messages")
+                messages = {f"{c}_{u}": {'message_id': int(m), 'last_update': t} for c, u, m, t in cur.fetchall()}
+                cur.execute("SELECT channel_id, role_id FROM ping_roles")
+                roles = {int(c): int(r) for c, r in cur.fetchall()}
+                cur.close(); conn.close()
+                return messages, roles
+            except Exception as e:
+                if strict:
+                    raise
+                print("Erreur chargement stream_messages:", e)
+                return {}, {}
+        with self._lock:
+            messages = {k: dict(v) for k, v in self._state_cache['messages'].items()}
+            roles = {int(c): r for c, r in self._state_cache['ping_roles'].items()}
+        return messages, roles
+
+    def mark_message(self, key, entry):
+        self._pending_messages[key] = {'message_id': entry['message_id'], 'last_update': entry['last_update']}
+
+    def forget_message(self, key):
+        self._pending_messages[key] = None
+
+    def set_ping_role(self, channel_id, role_id):
+        self._pending_roles[int(channel_id)] = role_id
+
+    def flush(self):
+        with self._lock:
+            return self._flush()
+
+    def _flush(self):
+        if not self._pending_messages and not self._pending_roles:
+            return 0
+        messages, self._pending_messages = self._pending_messages, {}
+        roles, self._pending_roles = self._pending_roles, {}
+        if self.db_url:
+            try:
+                conn = self.pg.connect(self.db_url)
+                cur = conn.cursor()
+                upserts = [(*key.split('_', 1), str(e['message_id']), e['last_update']) for key, e in messages.items() if e]
+                deletes = [tuple(key.split('_', 1)) for key, e in messages.items() if not e]
+                self.pg.extras.execute_batch(cur, """
+                    INSERT INTO stream_messages (channel_id, username, message_id, last_update) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (channel_id, username) DO UPDATE SET message_id=EXCLUDED.message_id, last_update=EXCLUDED.last_update
+                """, upserts)
+                self.pg.extras.execute_batch(cur, "DELETE FROM stream_messages WHERE channel_id=%s AND username=%s", deletes)
+                self.pg.extras.execute_batch(cur, """
+                    INSERT INTO ping_roles (channel_id, role_id) VALUES (%s, %s)
+                    ON CONFLICT (channel_id) DO UPDATE SET role_id=EXCLUDED.role_id
+                """, [(str(c), str(r)) for c, r in roles.items()])
+                conn.commit()
+                cur.close(); conn.close()
+            except Exception as e:
+                print("Erreur flush stream_messages:", e)
+                messages.update(self._pending_messages)
+                roles.update(self._pending_roles)
+                self._pending_messages, self._pending_roles = messages, roles
+                return 0
+        else:
+            for key, entry in messages.items():
+                if entry:
+                    self._state_cache['messages'][key] = entry
+                else:
+                    self._state_cache['messages'].pop(key, None)
+            for channel_id, role_id in roles.items():
+                self._state_cache['ping_roles'][str(channel_id)] = role_id
+            self._save_state_json()
+        return len(messages) + len(roles)
+
+    def _load_state_json(self):
+        try:
+            if os.path.exists(self.state_file):
+                data = codec.load_file(self.state_file)
+                self._state_cache = {'messages': data.get('messages', {}), 'ping_roles': data.get('ping_roles', {})}
+        except Exception as e:
+            print("Erreur chargement JSON stream_state:", e)
+
+    def _save_state_json(self):
+        try:
+            data = dict(self._state_cache, last_updated=datetime.now().isoformat())
+            codec.dump_file(data, self.state_file)
+            return True
+        except Exception as e:
+            print('Erreur sauvegarde JSON stream_state:', e)
+            return False
+
+stream_state_manager = LazyInstance(StreamStateManager)
+
+class EventManager:
+    def __init__(self):
+        self.db_url = os.environ.get('DATABASE_URL')
+        # Appelé via asyncio.to_thread: écritures JSON sérialisées
+        self._lock = threading.Lock()
+        if self.db_url:
+            self.pg = load_psycopg2()
+            self.init_database()
+        else:
+            self.data_dir = 'data'
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.events_file = os.path.join(self.data_dir, 'events.json')
+            self._events_cache = {'events': {}, 'next_id': 1}
+            self._load_events_json()
+
+    def init_database(self):
+        try:
+            conn = self.pg.connect(self.db_url)
+            cur = conn.cursor()
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id BIGSERIAL PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    notifications TEXT NOT NULL,
+                    message_channel_id TEXT,
+                    message_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+            cur.close()
+            conn.close()
+        except Exception as e:
+            print(f"Erreur base de données (events): {e}")
+
+    def _execute(self, sql, params=(), fetch=False):
+        conn = self.pg.connect(self.db_url)
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            rows = cur.fetchall() if fetch else None
+            conn.commit()
+            cur.close()
+            return rows
+        finally:
+            conn.close()
+
+    def load_all(self):
+        if self.db_url:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, headers=self.headers, params=params) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            all_streams.extend(data['data'])
+                rows = self._execute("SELECT id, data, notifications, message_channel_id, message_id FROM events", fetch=True)
             except Exception as e:
-                print(f"Erreur lors de la récupération des streams: {e}")
-        return all_streams
+                print("Erreur chargement events:", e)
+                return None
+            return {
+                int(i): {"event": dict(codec.loads(d), id=int(i)), "notifications": codec.loads(n),
+                         "message": (int(c), int(m)) if m else None}
+                for i, d, n, c, m in rows
+            }
+        with self._lock:
+            return {
+                int(i): {"event": dict(e["event"]), "notifications": dict(e["notifications"]),
+                         "message": tuple(e["message"]) if e.get("message") else None}
+                for i, e in self._events_cache['events'].items()
+            }
+
+    def add_event(self, event_data, notifications):
+        # L'id vient du backend: unique entre instances, contrairement à un compteur en mémoire
+        if self.db_url:
+            rows = self._execute(
+                "INSERT INTO events (data, notifications) VALUES (%s, %s) RETURNING id",
+                (codec.dumps_str(event_data), codec.dumps_str(notifications)), fetch=True
+            )
+            return int(rows[0][0])
+        with self._lock:
+            event_id = self._events_cache['next_id']
+            self._events_cache['next_id'] = event_id + 1
+            self._events_cache['events'][str(event_id)] = {"event": dict(event_data, id=event_id), "notifications": notifications, "message": None}
+            self._save_events_json()
+            return event_id
+
+    def set_message(self, event_id, channel_id, message_id):
+        if self.db_url:
+            self._execute("UPDATE events SET message_channel_id=%s, message_id=%s WHERE id=%s",
+                          (str(channel_id) if channel_id else None, str(message_id) if message_id else None, event_id))
+            return
+        with self._lock:
+            entry = self._events_cache['events'].get(str(event_id))
+            if entry:
+                entry["message"] = [channel_id, message_id] if message_id else None
+                self._save_events_json()
+
+    def update_notifications(self, event_id, notifications):
+        if self.db_url:
+            self._execute("UPDATE events SET notifications=%s WHERE id=%s", (codec.dumps_str(notifications), event_id))
+            return
+        with self._lock:
+            entry = self._events_cache['events'].get(str(event_id))
+            if entry:
+                entry["notifications"] = dict(notifications)
+                self._save_events_json()
+
+    def delete_event(self, event_id):
+        if self.db_url:
+            self._execute("DELETE FROM events WHERE id=%s", (event_id,))
+            return
+        with self._lock:
+            if self._events_cache['events'].pop(str(event_id), None) is not None:
+                self._save_events_json()
+
+    def _load_events_json(self):
+        try:
+            if os.path.exists(self.events_file):
+                data = codec.load_file(self.events_file)
+                self._events_cache = {'events': data.get('events', {}), 'next_id': data.get('next_id', 1)}
+        except Exception as e:
+            print("Erreur chargement JSON events:", e)
+
+    def _save_events_json(self):
+        try:
+            data = dict(self._events_cache, last_updated=datetime.now().isoformat())
+            codec.dump_file(data, self.events_file)
+            return True
+        except Exception as e:
+            print('Erreur sauvegarde JSON events:', e)
+            return False
+
+event_manager = LazyInstance(EventManager)
+
+WATCH_STATUS_FLUSH_SECONDS = 30
+
+@tasks.loop(seconds=WATCH_STATUS_FLUSH_SECONDS)
+@timed("loop.watched_status_flush")
+async def watched_status_flush():
+    flushed = await asyncio.to_thread(watched_player_manager.flush)
+    if flushed:
+        print(f"{flushed} statut(s) de joueurs surveillés sauvegardé(s)")
+
+streamers = {}
+stream_messages = {}
+currently_live_streamers = {}
+ping_roles = {}
+reaction_role_messages = {}
 
 twitch_api = TwitchAPI()
+twitch_user_resolver = TwitchUserResolver(twitch_api)
+twitch_metadata = TwitchMetadataCache(twitch_api)
+
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 0))
+worker_hub = WorkerHub(WORKER_PROCESSES, INTERACTIVE_SHARE) if WORKER_PROCESSES > 0 else None
+
+COORDINATION = os.getenv("COORDINATION", "0") == "1"
+COORDINATION_HEARTBEAT_SECONDS = 20
+coordinator = None
+
+def open_coordinator():
+    return Coordinator(db_url=os.getenv("DATABASE_URL"), instance_id=os.getenv("INSTANCE_ID"))
+
+async def start_coordination():
+    global coordinator
+    if not os.getenv("DATABASE_URL"):
+        print("Attention: sans DATABASE_URL, joueurs, streams et événements restent propres à chaque instance")
+    coordinator = await asyncio.to_thread(open_coordinator)
+    await asyncio.to_thread(coordinator.heartbeat)
+    print(f"Coordination active, instance {coordinator.instance_id}")
+    await start_loop(coordination_heartbeat, "Heartbeat de coordination")
+
+shared_ranks_since = 0
+
+@tasks.loop(seconds=COORDINATION_HEARTBEAT_SECONDS)
+@timed("loop.coordination_heartbeat")
+async def coordination_heartbeat():
+    try:
+        await asyncio.to_thread(coordinator.heartbeat)
+        await sync_shared_state()
+    except Exception as e:
+        print(f"Erreur heartbeat coordination: {e}")
+
+def merge_watched_players(players):
+    # Les dicts existants sont mis à jour sur place (game_watcher peut les tenir); le statut de
+    # l'instance propriétaire fait foi car il n'est écrit en base que par lots
+    for user_id in [u for u in watched_players if u not in players]:
+        del watched_players[user_id]
+    for user_id, player_list in players.items():
+        local = {p["puuid"]: p for p in watched_players.get(user_id, [])}
+        merged = []
+        for player_info in player_list:
+            mine = local.get(player_info["puuid"])
+            if mine is None:
+                merged.append(player_info)
+                continue
+            if owns(player_info["puuid"]):
+                player_info["last_status"] = mine["last_status"]
+            mine.update(player_info)
+            merged.append(mine)
+        watched_players[user_id] = merged
+
+async def sync_shared_ranks():
+    # Rangs rafraîchis par les autres instances (leaderboard_refresh ne traite que les joueurs possédés);
+    # marge d'une minute sur l'horodatage pour tolérer le décalage d'horloge entre machines
+    global shared_ranks_since
+    changes = await asyncio.to_thread(coordinator.changes, "ranks", shared_ranks_since - 60)
+    watched = {p["puuid"] for player_list in watched_players.values() for p in player_list}
+    for puuid, payload, updated_at in changes:
+        shared_ranks_since = max(shared_ranks_since, updated_at)
+        if puuid in watched and not owns(puuid):
+            ranking_index.update(puuid, payload["gamename"], payload["league"])
+
+async def sync_shared_state():
+    # Seuls les baux et la déduplication sont partagés en direct: les ensembles suivis sont relus depuis
+    # le backend pour voir les ajouts faits sur une autre instance, au plus tard au heartbeat suivant
+    players = await asyncio.to_thread(watched_player_manager.load_all, True)
+    merge_watched_players(players)
+    set_streamers(await asyncio.to_thread(stream_manager.get_all_streams, True))
+
+    messages, roles = await asyncio.to_thread(stream_state_manager.load_all, True)
+    ping_roles.update(roles)
+    # Messages live: ceux des streamers d'autres instances suivent la base, pour reprendre l'édition si l'anneau change
+    for key in [k for k in stream_messages if k not in messages and not owns_stream_key(k)]:
+        del stream_messages[key]
+    for key, entry in messages.items():
+        if not owns_stream_key(key):
+            stream_messages[key] = entry
+
+    stored = await asyncio.to_thread(event_manager.load_all)
+    if stored is not None:
+        apply_stored_events(stored, prune=True)
+
+    await sync_shared_ranks()
+
+    # Appelé à chaque heartbeat: seules les boucles arrêtées sont démarrées, sans message sinon
+    if any(owned_watched_players().values()):
+        for loop, label in ((game_watcher, "LoL watcher"), (leaderboard_refresh, "Classement LoL")):
+            if not loop.is_running():
+                await start_loop(loop, label)
+
+async def is_leader(name):
+    if coordinator is None:
+        return True
+    try:
+        return await asyncio.to_thread(coordinator.try_lead, name)
+    except Exception as e:
+        print(f"Erreur élection {name}: {e}")
+        return False
+
+def owns(key):
+    return coordinator is None or coordinator.owns(key)
+
+def owns_stream_key(key):
+    suffix = key.split('_', 1)[1]
+    return owns(int(suffix) if suffix.isdigit() else suffix)
+
+def owned_watched_players():
+    if coordinator is None:
+        return watched_players
+    return {user_id: [p for p in player_list if coordinator.owns(p["puuid"])] for user_id, player_list in watched_players.items()}
+
+async def claim_notification(key):
+    if coordinator is None:
+        return True
+    try:
+        return await asyncio.to_thread(coordinator.claim, key)
+    except Exception as e:
+        print(f"Erreur dédoublonnage {key}: {e}")
+        return True
 
-def format_viewer_count(count):
-    if count >= 1000:
-        return f"{count//1000}k"
-    return str(count)
+async def release_notification(key):
+    if coordinator is None:
+        return
+    try:
+        await asyncio.to_thread(coordinator.unclaim, key)
+    except Exception as e:
+        print(f"Erreur libération dédoublonnage {key}: {e}")
+
+def stream_start_time(stream):
+    started_at = datetime.fromisoformat(stream['started_at'].replace('Z', '+00:00'))
+    return started_at.astimezone(TIMEZONE).strftime('%H:%M')
 
 @tasks.loop(minutes=2)
+@timed("loop.check_streams")
 async def check_streams():
     print(f"Vérification des streams Twitch - {datetime.now(TIMEZONE).strftime('%H:%M:%S')}")
     
-    for channel_id, streamer_list in streamers.items():
-        if not streamer_list:
-            continue
-        channel = bot.get_channel(channel_id)
-        if not channel:
-            continue
-        streams = await twitch_api.get_streams(streamer_list)
-        live_now = {s['user_login']: s for s in streams}
-        
-        for username, stream in live_now.items():
-            key = f"{channel_id}_{username}"
-            if key in stream_messages:
-                try:
-                    stream = live_now[username]
-                    stored_msg = stream_messages[key]
-                    
-                    if 'message_obj' in stored_msg:
-                        message = stored_msg['message_obj']
-                    else:
-                        message = await channel.fetch_message(stored_msg['message_id'])
-                        stream_messages[key]['message_obj'] = message
-                    
-                    updated_embed = discord.Embed(
-                        title=f"🔴 {stream['user_name']} est en live !",
-                        description=stream['title'],
-                        url=f"https://twitch.tv/{username}",
-                        color=0x9146ff
-                    )
-                    
-                    viewer_count = stream.get('viewer_count', 0)
-                    updated_embed.add_field(
-                        name="👥 Viewers", 
-                        value=f"**{format_viewer_count(viewer_count)}** spectateurs", 
-                        inline=True
-                    )
-                    
-                    if stream.get('game_name'):
-                        updated_embed.add_field(
-                            name="🎮 Jeu", 
-                            value=stream['game_name'], 
-                            inline=True
-                        )
-                    
-                    thumbnail_url = stream.get('thumbnail_url', '').replace('{width}', '1280').replace('{height}', '720')
-                    if thumbnail_url:
-                        updated_embed.set_image(url=thumbnail_url)
-                    
-                    started_at = datetime.fromisoformat(stream['started_at'].replace('Z', '+00:00'))
-                    started_at_paris = started_at.astimezone(TIMEZONE)
-                    updated_embed.set_footer(
-                        text=f"Stream commencé à {started_at_paris.strftime('%H:%M')} • Dernière MàJ: {datetime.now(TIMEZONE).strftime('%H:%M')}"
+    await migrate_legacy_stream_keys()
+    user_ids = sorted({u for streamer_list in streamers.values() for u in streamer_list if owns(u)})
+    if worker_hub:
+        await worker_hub.assign_streamers(user_ids)
+        return
+    
+    # Un seul lot de requêtes pour tous les salons: un streamer suivi dans plusieurs salons n'est interrogé qu'une fois
+    await on_worker_streams(user_ids, await twitch_api.get_streams(user_ids))
+
+async def update_channel_streams(channel, streamer_list, streams):
+    channel_id = channel.id
+    live_now = {int(s['user_id']): s for s in streams}
+    
+    for user_id, stream in live_now.items():
+        username = stream['user_login']
+        key = f"{channel_id}_{user_id}"
+        claim_key = f"stream:{channel_id}:{user_id}:{stream.get('id') or stream.get('started_at')}"
+        if key in stream_messages:
+            try:
+                message = channel.get_partial_message(stream_messages[key]['message_id'])
+                with timer("embeds.stream"):
+                    updated_embed = stream_embed(
+                        stream, username,
+                        f"Stream commencé à {stream_start_time(stream)} • Dernière MàJ: {datetime.now(TIMEZONE).strftime('%H:%M')}",
+                        twitch_metadata.user(user_id), twitch_metadata.game(stream.get('game_id'))
                     )
-                    
+                viewer_count = stream.get('viewer_count', 0)
+                
+                with timer("discord.edit_stream"):
                     await message.edit(embed=updated_embed)
-                    stream_messages[key]['last_update'] = datetime.now(UTC).timestamp()
-                    
-                    print(f"Stream mis à jour: {stream['user_name']} ({viewer_count} viewers)")
-                    
-                except Exception as e:
-                    print(f"Erreur mise à jour embed pour {username}: {e}")
+                stream_messages[key]['last_update'] = datetime.now(UTC).timestamp()
+                
+                print(f"Stream mis à jour: {stream['user_name']} ({viewer_count} viewers)")
+                continue
+            except discord.NotFound:
+                # Embed supprimé à la main: on libère la clé pour qu'il soit republié
+                del stream_messages[key]
+                stream_state_manager.forget_message(key)
+                await release_notification(claim_key)
+            except Exception as e:
+                print(f"Erreur mise à jour embed pour {username}: {e}")
                 continue
 
-            embed = discord.Embed(
-                title=f"🔴 {stream['user_name']} est en live !",
-                description=stream['title'],
-                url=f"https://twitch.tv/{username}",
-                color=0x9146ff
-            )
-            
-            viewer_count = stream.get('viewer_count', 0)
-            embed.add_field(
-                name="👥 Viewers", 
-                value=f"**{format_viewer_count(viewer_count)}** spectateurs", 
-                inline=True
-            )
-            
-            if stream.get('game_name'):
-                embed.add_field(
-                    name="🎮 Jeu", 
-                    value=stream['game_name'], 
-                    inline=True
-                )
-            
-            thumbnail_url = stream.get('thumbnail_url', '').replace('{width}', '1280').replace('{height}', '720')
-            if thumbnail_url:
-                embed.set_image(url=thumbnail_url)
-            
-            started_at = datetime.fromisoformat(stream['started_at'].replace('Z', '+00:00'))
-            started_at_paris = started_at.astimezone(TIMEZONE)
-            embed.set_footer(
-                text=f"Stream commencé à {started_at_paris.strftime('%H:%M')} • Mise à jour toutes les 2 min"
-            )
-            
-            ping_content = f"<@&{ping_roles.get(channel_id)}>" if ping_roles.get(channel_id) else None
+        if not await claim_notification(claim_key):
+            continue
+
+        embed = stream_embed(stream, username, f"Stream commencé à {stream_start_time(stream)} • Mise à jour toutes les 2 min",
+                             twitch_metadata.user(user_id), twitch_metadata.game(stream.get('game_id')))
+        viewer_count = stream.get('viewer_count', 0)
+        
+        ping_content = f"<@&{ping_roles.get(channel_id)}>" if ping_roles.get(channel_id) else None
+        with timer("discord.send_stream"):
             msg = await channel.send(content=ping_content, embed=embed)
-            stream_messages[key] = {
-                'message_id': msg.id, 
-                'last_update': datetime.now(UTC).timestamp(),
-                'message_obj': msg
-            }
-            
-            print(f"Nouveau stream détecté: {stream['user_name']} ({viewer_count} viewers)")
+        stream_messages[key] = {
+            'message_id': msg.id, 
+            'last_update': datetime.now(UTC).timestamp()
+        }
+        stream_state_manager.mark_message(key, stream_messages[key])
+        
+        print(f"Nouveau stream détecté: {stream['user_name']} ({viewer_count} viewers)")
 
-        for username in streamer_list:
-            key = f"{channel_id}_{username}"
-            if key in stream_messages and username not in live_now:
-                try:
-                    if 'message_obj' in stream_messages[key]:
-                        await stream_messages[key]['message_obj'].delete()
-                    else:
-                        message = await channel.fetch_message(stream_messages[key]['message_id'])
-                        await message.delete()
-                    print(f"Stream terminé: {username}")
-                except:
-                    pass
-                del stream_messages[key]
+    for user_id in streamer_list:
+        key = f"{channel_id}_{user_id}"
+        if key in stream_messages and user_id not in live_now:
+            try:
+                await channel.get_partial_message(stream_messages[key]['message_id']).delete()
+                print(f"Stream terminé: {twitch_user_resolver.login_for(user_id) or user_id}")
+            except:
+                pass
+            del stream_messages[key]
+            stream_state_manager.forget_message(key)
+
+async def on_worker_streams(user_ids, streams):
+    twitch_user_resolver.remember_streams(streams)
+    await twitch_metadata.refresh(streams)
+    covered = set(user_ids)
+    for channel_id, streamer_list in streamers.items():
+        channel_user_ids = [u for u in streamer_list if u in covered]
+        if not channel_user_ids:
+            continue
+        channel = bot.get_channel(channel_id)
+        if not channel:
+            continue
+        await update_channel_streams(channel, channel_user_ids, [s for s in streams if int(s['user_id']) in channel_user_ids])
+    await asyncio.to_thread(stream_state_manager.flush)
 
 @check_streams.before_loop
 async def before_check(): await bot.wait_until_ready()
@@ -1734,6 +2570,111 @@ class Event:
         self.description = description
         self.created_at = get_current_time()
 
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join('data', 'state.snap'))
+SNAPSHOT_INTERVAL_MINUTES = 10
+snapshot_info = {"restored": False, "clean": False, "restore_ms": None, "written_at": None, "bytes": None}
+
+def event_to_dict(event):
+    return dict(vars(event), date=event.date.isoformat(), created_at=event.created_at.isoformat())
+
+def event_from_dict(data):
+    data = dict(data)
+    created_at = datetime.fromisoformat(data.pop("created_at")).astimezone(TIMEZONE)
+    event = Event(**dict(data, date=datetime.fromisoformat(data["date"]).astimezone(TIMEZONE)))
+    event.created_at = created_at
+    return event
+
+def apply_stored_events(stored, prune=False):
+    global event_id_counter
+    # prune: le backend fait foi, les événements supprimés par une autre instance disparaissent aussi ici
+    if prune:
+        for eid in [eid for eid in events if eid not in stored]:
+            events.pop(eid, None)
+            notifications_sent.pop(eid, None)
+            notification_messages.pop(eid, None)
+            event_messages.pop(eid, None)
+    for eid, entry in stored.items():
+        if eid not in events:
+            events[eid] = event_from_dict(entry["event"])
+            notification_messages.setdefault(eid, [])
+        local = notifications_sent.get(eid, {})
+        notifications_sent[eid] = {k: bool(v or local.get(k)) for k, v in entry["notifications"].items()}
+        if entry["message"] and eid not in event_messages:
+            channel = bot.get_channel(entry["message"][0])
+            if channel is not None:
+                event_messages[eid] = channel.get_partial_message(entry["message"][1])
+        elif not entry["message"] and prune:
+            event_messages.pop(eid, None)
+    if stored:
+        event_id_counter = max(event_id_counter, max(stored) + 1)
+
+def collect_state():
+    # Uniquement des types de base: le chargement refuse toute classe (voir snapshot._PlainUnpickler)
+    return {
+        "saved_at": time.time(),
+        "streamers": {cid: list(ids) for cid, ids in streamers.items()},
+        "stream_messages": {k: dict(v) for k, v in stream_messages.items()},
+        "ping_roles": dict(ping_roles),
+        "watched_players": {uid: [dict(p) for p in players] for uid, players in watched_players.items()},
+        "event_id_counter": event_id_counter,
+        "events": {eid: event_to_dict(e) for eid, e in events.items()},
+        "notifications_sent": {eid: dict(sent) for eid, sent in notifications_sent.items()},
+        "event_messages": {
+            eid: (message.channel.id, message.id) for eid, message in event_messages.items()
+            if getattr(message, 'channel', None) is not None
+        },
+    }
+
+def apply_state(state):
+    global event_id_counter
+    # Repris uniquement d'un snapshot propre (écrit à l'arrêt): sinon la base fait foi
+    for eid, data in state["events"].items():
+        events[eid] = event_from_dict(data)
+        notification_messages.setdefault(eid, [])
+    notifications_sent.update(state["notifications_sent"])
+    event_id_counter = max(event_id_counter, state["event_id_counter"])
+    for eid, (channel_id, message_id) in state["event_messages"].items():
+        channel = bot.get_channel(channel_id)
+        if channel is not None:
+            event_messages[eid] = channel.get_partial_message(message_id)
+    streamers.update(state["streamers"])
+    stream_messages.update(state["stream_messages"])
+    ping_roles.update(state["ping_roles"])
+    watched_players.update(state["watched_players"])
+
+async def restore_snapshot():
+    if not os.path.exists(SNAPSHOT_PATH):
+        print("Aucun snapshot d'état, hydratation complète")
+        return
+    started = time.perf_counter()
+    try:
+        state, clean = await asyncio.to_thread(read_snapshot, SNAPSHOT_PATH)
+    except (SnapshotError, OSError, pickle.UnpicklingError, EOFError) as e:
+        print(f"Snapshot d'état ignoré: {e}")
+        return
+    # En mode coordonné, d'autres instances ont pu modifier la base pendant l'arrêt
+    if not clean or COORDINATION:
+        print("Snapshot non repris (arrêt non propre ou mode coordonné), hydratation depuis la base")
+        return
+    apply_state(state)
+    snapshot_info.update(restored=True, clean=True, restore_ms=round((time.perf_counter() - started) * 1000, 1))
+    print(f"Snapshot restauré en {snapshot_info['restore_ms']}ms "
+          f"({len(state['events'])} événement(s), âge {int(time.time() - state['saved_at'])}s)")
+
+async def save_snapshot(clean=False):
+    data = encode_snapshot(collect_state(), clean=clean)
+    await asyncio.to_thread(write_snapshot, SNAPSHOT_PATH, data)
+    snapshot_info.update(written_at=time.time(), bytes=len(data))
+    return len(data)
+
+@tasks.loop(minutes=SNAPSHOT_INTERVAL_MINUTES)
+@timed("loop.state_snapshot")
+async def state_snapshot():
+    try:
+        await save_snapshot()
+    except Exception as e:
+        print(f"Erreur écriture du snapshot d'état: {e}")
+
 def save_guild_config(guild_id, config):
     guild_role_configs[guild_id] = config
 
@@ -1748,80 +2689,6 @@ def get_role_by_category(guild, category):
         return guild.get_role(role_id)
     return None
 
-def create_event_embed(event, detailed=False):
-    embed = discord.Embed(title=f"🎉 {event.name}", timestamp=event.created_at, color=0x00AE86)
-    embed.add_field(name="📅 Date", value=format_date(event.date), inline=True)
-    
-    if hasattr(event, 'category') and event.category:
-        category_names = {
-            'lec': '🏆 LEC',
-            'lfl': '🇫🇷 LFL', 
-            'rl': '🚗 Rocket League',
-            'r6': '🎯 Rainbow Six',
-            'chess': '♟️ Échecs'
-        }
-        category_display = category_names.get(event.category, f"🎮 {event.category.upper()}")
-        embed.add_field(name="🎮 Catégorie", value=category_display, inline=True)
-    else:
-        embed.add_field(name="\u200b", value="\u200b", inline=True)
-    
-    if event.lieu:
-        embed.add_field(name="📍 Lieu", value=event.lieu, inline=True)
-    if event.stream:
-        embed.add_field(name="📺 Stream", value=event.stream, inline=False)
-    if event.description and detailed:
-        embed.add_field(name="📝 Description", value=event.description, inline=False)
-    
-    if event.image and event.image.strip():
-        if event.image.startswith(('http://', 'https://')):
-            embed.set_image(url=event.image)
-        else:
-            embed.add_field(name="⚠️ Image", value="URL d'image invalide", inline=False)
-    
-    embed.set_footer(text=f"Créé par {event.creator}")
-    return embed
-
-def create_notification_embed(event, minutes_before):
-    if minutes_before == 0:
-        title = f"🔴 LIVE MAINTENANT - {event.name}"
-        color = 0xFF0000
-        message = "L'événement commence maintenant !"
-    else:
-        title = f"⏰ {event.name} - Dans {minutes_before} minutes"
-        color = 0xFFA500
-        message = f"L'événement commence dans {minutes_before} minutes !"
-    
-    embed = discord.Embed(
-        title=title,
-        description=message,
-        color=color,
-        timestamp=get_current_time()
-    )
-    
-    embed.add_field(name="📅 Heure de début", value=format_date(event.date), inline=True)
-    
-    if hasattr(event, 'category') and event.category:
-        category_names = {
-            'lec': '🏆 LEC',
-            'lfl': '🇫🇷 LFL', 
-            'rl': '🚗 Rocket League',
-            'r6': '🎯 Rainbow Six',
-            'chess': '♟️ Échecs'
-        }
-        category_display = category_names.get(event.category, event.category.upper())
-        embed.add_field(name="🎮 Catégorie", value=category_display, inline=True)
-    
-    if event.lieu:
-        embed.add_field(name="📍 Lieu", value=event.lieu, inline=True)
-    
-    if event.stream:
-        embed.add_field(name="📺 Stream", value=event.stream, inline=False)
-    
-    if event.image and event.image.startswith(('http://', 'https://')):
-        embed.set_image(url=event.image)
-    
-    return embed
-
 async def delete_message_after_delay(message, delay_minutes):
     await asyncio.sleep(delay_minutes * 60)
     try:
@@ -1830,8 +2697,11 @@ async def delete_message_after_delay(message, delay_minutes):
         pass
 
 @tasks.loop(minutes=1)
+@timed("loop.notification_system")
 async def notification_system():
     try:
+        if not await is_leader("notification_system"):
+            return
         now = get_current_time()
         print(f"Vérification des notifications à {now.strftime('%d/%m/%Y %H:%M:%S')} (heure française)")
         
@@ -1845,26 +2715,64 @@ async def notification_system():
             if minutes <= 15 and not notifications_sent[event_id]["15min"]:
                 notification_msg = await send_event_notification(event, 15)
                 if notification_msg:
+                    notification_msg = message_handle(notification_msg)
                     notification_messages[event_id].append(notification_msg)
                     asyncio.create_task(delete_message_after_delay(notification_msg, 5))
                 notifications_sent[event_id]["15min"] = True
+                await asyncio.to_thread(event_manager.update_notifications, event_id, notifications_sent[event_id])
             
             elif minutes <= 0 and not notifications_sent[event_id]["live"]:
                 notification_msg = await send_event_notification(event, 0)
                 if notification_msg:
+                    notification_msg = message_handle(notification_msg)
                     notification_messages[event_id].append(notification_msg)
                     asyncio.create_task(delete_message_after_delay(notification_msg, 5))
                 notifications_sent[event_id]["live"] = True
+                await asyncio.to_thread(event_manager.update_notifications, event_id, notifications_sent[event_id])
             
-            elif delta.total_seconds() < -1800:
-                if event_id in event_messages:
-                    try: 
-                        await event_messages[event_id].delete()
-                    except: 
-                        pass
-                    del event_messages[event_id]
+            elif delta.total_seconds() < -1800 and event_id in event_messages:
+                try: 
+                    await event_messages[event_id].delete()
+                except: 
+                    pass
+                del event_messages[event_id]
+                await asyncio.to_thread(event_manager.set_message, event_id, None, None)
             
             elif delta.total_seconds() < -7200:
                 await delete_event_message(event_id)
                 
     except Exception as e:
+        print(f"Erreur dans notification_system: {e}")
+        import traceback
+        traceback.print_exc()
+
+@notification_system.before_loop
+async def before_notification_system():
+    await bot.wait_until_ready()
+
+if __name__ == '__main__':
+    token = os.getenv("DISCORD_TOKEN")
+    if not token:
+        print("DISCORD_TOKEN manquant dans les variables d'environnement!")
+        print("Assurez-vous que la variable DISCORD_TOKEN est définie")
+        exit(1)
+    
+    print("Démarrage du Bot Alpine Unifié...")
+    print(f"Variables d'environnement:")
+    print(f"  - DISCORD_TOKEN: {'Défini' if token else 'Manquant'}")
+    print(f"  - TWITCH_CLIENT_ID: {'Défini' if os.getenv('TWITCH_CLIENT_ID') else 'Manquant'}")
+    print(f"  - TWITCH_CLIENT_SECRET: {'Défini' if os.getenv('TWITCH_CLIENT_SECRET') else 'Manquant'}")
+    print(f"  - RIOT_API_KEY: {'Défini' if os.getenv('RIOT_API_KEY') else 'Manquant'}")
+    print(f"  - PORT: {os.getenv('PORT') if os.getenv('PORT') else 'Non défini'}")
+    print("-" * 50)
+    
+    try:
+        bot.run(token)
+    except KeyboardInterrupt:
+        print("\nArrêt manuel détecté...")
+    except Exception as e:
+        print(f"ERREUR CRITIQUE lors du démarrage du bot: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        print("Bot arrêté!")
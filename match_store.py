@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import zlib
+
+import codec
+
+
+class MatchStore:
+    def __init__(self, path=None):
+        self.path = path or os.path.join('data', 'matches.db')
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS matches (
+                match_id TEXT PRIMARY KEY,
+                game_creation INTEGER NOT NULL,
+                queue_id INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS match_participants (
+                puuid TEXT NOT NULL,
+                match_id TEXT NOT NULL,
+                PRIMARY KEY (puuid, match_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def has_match(self, match_id):
+        row = self.conn.execute("SELECT 1 FROM matches WHERE match_id=?", (match_id,)).fetchone()
+        return row is not None
+
+    def missing_matches(self, match_ids):
+        if not match_ids:
+            return []
+        placeholders = ",".join("?" * len(match_ids))
+        rows = self.conn.execute(f"SELECT match_id FROM matches WHERE match_id IN ({placeholders})", list(match_ids)).fetchall()
+        known = {r[0] for r in rows}
+        return [m for m in match_ids if m not in known]
+
+    def add_match(self, match):
+        metadata = match.get("metadata", {})
+        info = match.get("info", {})
+        match_id = metadata.get("matchId")
+        if not match_id:
+            return False
+        blob = zlib.compress(codec.dumps(match))
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO matches (match_id, game_creation, queue_id, data) VALUES (?, ?, ?, ?)",
+            (match_id, info.get("gameCreation", 0), info.get("queueId", 0), blob)
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO match_participants (puuid, match_id) VALUES (?, ?)",
+            [(puuid, match_id) for puuid in metadata.get("participants", [])]
+        )
+        self.conn.commit()
+        return cur.rowcount > 0
+
+    def get_match(self, match_id):
+        row = self.conn.execute("SELECT data FROM matches WHERE match_id=?", (match_id,)).fetchone()
+        if not row:
+            return None
+        return codec.loads(zlib.decompress(row[0]))
+
+    def iter_matches(self):
+        # Connexion dédiée: le parcours complet peut tourner dans un thread sans toucher à self.conn
+        conn = sqlite3.connect(self.path)
+        try:
+            for (data,) in conn.execute("SELECT data FROM matches ORDER BY game_creation"):
+                yield codec.loads(zlib.decompress(data))
+        finally:
+            conn.close()
+
+    def get_match_ids_for_puuid(self, puuid, limit=20):
+        rows = self.conn.execute("""
+            SELECT m.match_id FROM match_participants p
+            JOIN matches m ON m.match_id = p.match_id
+            WHERE p.puuid=? ORDER BY m.game_creation DESC LIMIT ?
+        """, (puuid, limit)).fetchall()
+        return [r[0] for r in rows]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
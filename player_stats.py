@@ -0,0 +1,145 @@
+import numpy as np
+
+COLUMNS = {
+    "champion_id": np.int32,
+    "win": np.int8,
+    "kills": np.int16,
+    "deaths": np.int16,
+    "assists": np.int16,
+    "cs": np.int32,
+    "duration": np.float32,
+    "game_creation": np.int64,
+}
+
+
+class PlayerStatsIndex:
+    def __init__(self, capacity=4096):
+        self.size = 0
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.rows_by_puuid = {}
+        self.champion_names = {}
+        self.match_ids = set()
+        self._sorted_rows = {}
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        for name, column in self.columns.items():
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def add_match(self, match):
+        match_id = match.get("metadata", {}).get("matchId")
+        if not match_id or match_id in self.match_ids:
+            return 0
+        self.match_ids.add(match_id)
+
+        info = match.get("info", {})
+        duration = info.get("gameDuration", 0)
+        # Avant le patch 11.20, gameDuration est en millisecondes (pas de gameEndTimestamp)
+        if "gameEndTimestamp" not in info:
+            duration /= 1000
+        game_creation = info.get("gameCreation", 0)
+
+        added = 0
+        for participant in info.get("participants", []):
+            puuid = participant.get("puuid")
+            if not puuid:
+                continue
+            if self.size == len(self.columns["win"]):
+                self._grow()
+
+            i = self.size
+            columns = self.columns
+            champion_id = participant.get("championId", 0)
+            columns["champion_id"][i] = champion_id
+            columns["win"][i] = 1 if participant.get("win") else 0
+            columns["kills"][i] = participant.get("kills", 0)
+            columns["deaths"][i] = participant.get("deaths", 0)
+            columns["assists"][i] = participant.get("assists", 0)
+            columns["cs"][i] = participant.get("totalMinionsKilled", 0) + participant.get("neutralMinionsKilled", 0)
+            columns["duration"][i] = duration
+            columns["game_creation"][i] = game_creation
+
+            if champion_id not in self.champion_names and participant.get("championName"):
+                self.champion_names[champion_id] = participant["championName"]
+
+            self.rows_by_puuid.setdefault(puuid, []).append(i)
+            self._sorted_rows.pop(puuid, None)
+            self.size += 1
+            added += 1
+        return added
+
+    def load_from_store(self, store):
+        for match in store.iter_matches():
+            self.add_match(match)
+
+    def games_count(self, puuid):
+        return len(self.rows_by_puuid.get(puuid, ()))
+
+    def _rows(self, puuid, count=None):
+        rows = self._sorted_rows.get(puuid)
+        if rows is None:
+            rows = np.fromiter(self.rows_by_puuid.get(puuid, ()), dtype=np.int64)
+            rows = rows[np.argsort(-self.columns["game_creation"][rows], kind="stable")]
+            self._sorted_rows[puuid] = rows
+        return rows[:count] if count else rows
+
+    def player_stats(self, puuid, count=None, trend_window=10):
+        rows = self._rows(puuid, count)
+        games = len(rows)
+        if not games:
+            return None
+
+        wins = self.columns["win"][rows].astype(np.float64)
+        kills = self.columns["kills"][rows].astype(np.float64)
+        deaths = self.columns["deaths"][rows].astype(np.float64)
+        assists = self.columns["assists"][rows].astype(np.float64)
+        cs = self.columns["cs"][rows].astype(np.float64)
+        minutes = self.columns["duration"][rows].astype(np.float64) / 60
+
+        champions, inverse = np.unique(self.columns["champion_id"][rows], return_inverse=True)
+        champ_games = np.bincount(inverse)
+        champ_wins = np.bincount(inverse, weights=wins)
+        champ_kills = np.bincount(inverse, weights=kills)
+        champ_deaths = np.bincount(inverse, weights=deaths)
+        champ_assists = np.bincount(inverse, weights=assists)
+        champ_kda = (champ_kills + champ_assists) / np.maximum(champ_deaths, 1)
+        order = np.lexsort((-champ_wins, -champ_games))
+
+        per_champion = [
+            {
+                "champion_id": int(champions[i]),
+                "champion": self.champion_names.get(int(champions[i]), f"Champion #{champions[i]}"),
+                "games": int(champ_games[i]),
+                "wins": int(champ_wins[i]),
+                "winrate": round(float(champ_wins[i] / champ_games[i]) * 100, 1),
+                "kda": round(float(champ_kda[i]), 2),
+            }
+            for i in order
+        ]
+
+        # Tendance: winrate glissant en ordre chronologique, et demi-historique récent vs ancien
+        window = min(trend_window, games)
+        chronological = wins[::-1]
+        rolling = np.convolve(chronological, np.ones(window) / window, mode="valid")
+        half = games // 2
+        recent_winrate = float(wins[:half].mean()) * 100 if half else float(wins.mean()) * 100
+        previous_winrate = float(wins[half:].mean()) * 100
+
+        total_minutes = minutes.sum()
+        return {
+            "games": games,
+            "wins": int(wins.sum()),
+            "winrate": round(float(wins.mean()) * 100, 1),
+            "kills": round(float(kills.mean()), 1),
+            "deaths": round(float(deaths.mean()), 1),
+            "assists": round(float(assists.mean()), 1),
+            "kda": round(float((kills.sum() + assists.sum()) / max(deaths.sum(), 1)), 2),
+            "cs_per_min": round(float(cs.sum() / total_minutes), 1) if total_minutes else 0.0,
+            "champions": per_champion,
+            "rolling_winrate": [round(float(v) * 100, 1) for v in rolling],
+            "trend": round(recent_winrate - previous_winrate, 1),
+        }
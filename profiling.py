@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+import asyncio
+import functools
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+
+SLOW_CALLBACK_SECONDS = float(os.getenv("SLOW_CALLBACK_MS", 250)) / 1000
+SLOW_CALLBACK_HISTORY = 50
+
+
+class TimingRegistry:
+    def __init__(self):
+        self.stats = {}
+        self.slow_callbacks = deque(maxlen=SLOW_CALLBACK_HISTORY)
+
+    def record(self, name, elapsed):
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = [0, 0.0, 0.0]
+        stat[0] += 1
+        stat[1] += elapsed
+        if elapsed > stat[2]:
+            stat[2] = elapsed
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.record(name, time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        return {
+            name: {
+                "count": count,
+                "total_ms": round(total * 1000, 1),
+                "avg_ms": round(total / count * 1000, 2),
+                "max_ms": round(worst * 1000, 1),
+            }
+            for name, (count, total, worst) in sorted(self.stats.items())
+        }
+
+
+registry = TimingRegistry()
+timed = registry.timed
+timer = registry.timer
+
+
+def callback_name(callback):
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f"Task {getattr(coro, '__qualname__', repr(coro))}"
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+def enable_slow_callback_detection(threshold=SLOW_CALLBACK_SECONDS):
+    # Chronomètre chaque callback exécuté par la boucle (Handle._run), comme le mode debug
+    # d'asyncio mais sans son surcoût global
+    handle_run = asyncio.events.Handle._run
+    if getattr(handle_run, "_profiled", False):
+        return
+
+    def _run(handle):
+        start = time.perf_counter()
+        handle_run(handle)
+        elapsed = time.perf_counter() - start
+        if elapsed >= threshold:
+            name = callback_name(getattr(handle, "_callback", None))
+            registry.slow_callbacks.append({"callback": name, "duration_ms": round(elapsed * 1000, 1), "at": time.time()})
+            registry.record("loop.slow_callback", elapsed)
+            print(f"Callback lent ({elapsed * 1000:.0f} ms): {name}")
+
+    _run._profiled = True
+    asyncio.events.Handle._run = _run
+
+
+def frame_stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def sample_thread(thread_id, seconds, interval=0.005):
+    samples = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            samples[frame_stack(frame)] += 1
+        time.sleep(interval)
+    return samples
+
+
+async def profile_loop(seconds, interval=0.005):
+    # Échantillonne la pile du thread de la boucle depuis un thread à part, format "collapsed"
+    # (une pile par ligne suivie du nombre d'échantillons) lisible par flamegraph.pl/speedscope
+    samples = await asyncio.to_thread(sample_thread, threading.get_ident(), seconds, interval)
+    return "\n".join(f"{stack} {count}" for stack, count in samples.most_common())
+
+
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL_MS", 100)) / 1000
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", 200)) / 1000
+
+
+class LoopLagMonitor:
+    def __init__(self, interval=LOOP_LAG_INTERVAL, threshold=LOOP_BLOCK_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.samples = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.blocked = deque(maxlen=SLOW_CALLBACK_HISTORY)
+        self.last_beat = None
+        self.loop_thread = None
+        self._stall = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self.loop_thread = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _measure(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.last_beat = time.monotonic()
+            self.record(max(0.0, self.last_beat - start - self.interval))
+
+    def record(self, lag):
+        lag_ms = lag * 1000
+        bucket = 0
+        while bucket < len(LAG_BUCKETS_MS) and lag_ms > LAG_BUCKETS_MS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+        self.samples += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        if self._stall is not None:
+            self._stall["lag_ms"] = round(lag_ms, 1)
+            self._stall = None
+
+    # Thread de surveillance: si la boucle n'a pas battu depuis plus que le seuil, on capture la pile
+    # du thread de la boucle pendant qu'il est encore bloqué (une seule capture par blocage)
+    def _watch(self):
+        captured_beat = None
+        while not self._stop.wait(min(self.interval, self.threshold) / 2):
+            beat = self.last_beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or captured_beat == beat:
+                continue
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is None:
+                continue
+            captured_beat = beat
+            self._stall = {"at": time.time(), "blocked_ms": round(stalled * 1000, 1), "lag_ms": None, "stack": frame_stack(frame)}
+            self.blocked.append(self._stall)
+            print(f"Boucle bloquée depuis {stalled * 1000:.0f} ms: {self._stall['stack'].rsplit(';', 1)[-1]}")
+
+    def snapshot(self):
+        labels = [f"<={b}ms" for b in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+        return {
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "histogram": dict(zip(labels, self.histogram)),
+            "blocking_events": list(self.blocked)[-10:],
+        }
+
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,93 @@
+import bisect
+import time
+
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND", "MASTER", "GRANDMASTER", "CHALLENGER"]
+DIVISIONS = {"IV": 0, "III": 1, "II": 2, "I": 3}
+LP_SPAN = 100000
+
+
+def encode_rank(tier, rank, lp):
+    if not tier or tier.upper() not in TIERS:
+        return 0
+    division = DIVISIONS.get(rank, 3)
+    return ((TIERS.index(tier.upper()) + 1) * 4 + division) * LP_SPAN + max(0, min(int(lp), LP_SPAN - 1))
+
+
+def decode_rank(key):
+    if key <= 0:
+        return "UNRANKED", "", 0
+    tier_division, lp = divmod(key, LP_SPAN)
+    tier_index, division = divmod(tier_division, 4)
+    rank = next(name for name, value in DIVISIONS.items() if value == division)
+    return TIERS[tier_index - 1], rank, lp
+
+
+class RankingIndex:
+    def __init__(self):
+        self.entries = {}
+        self.by_name = {}
+        self._sorted = []
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def update(self, puuid, gamename, league_entry):
+        tier = league_entry.get("tier") if league_entry else None
+        rank = league_entry.get("rank", "") if league_entry else ""
+        lp = league_entry.get("leaguePoints", 0) if league_entry else 0
+        key = encode_rank(tier, rank, lp)
+
+        previous = self.entries.get(puuid)
+        if previous and previous["key"] != key:
+            self._remove_sorted(puuid, previous["key"])
+        if not previous or previous["key"] != key:
+            bisect.insort(self._sorted, (-key, puuid))
+
+        if previous and previous["gamename"].lower() != gamename.lower():
+            self.by_name.pop(previous["gamename"].lower(), None)
+        self.by_name[gamename.lower()] = puuid
+        self.entries[puuid] = {
+            "puuid": puuid,
+            "gamename": gamename,
+            "key": key,
+            "tier": tier.upper() if key else "UNRANKED",
+            "rank": rank if key else "",
+            "lp": lp if key else 0,
+            "wins": league_entry.get("wins", 0) if league_entry else 0,
+            "losses": league_entry.get("losses", 0) if league_entry else 0,
+            "updated_at": time.time(),
+        }
+
+    def remove(self, puuid):
+        entry = self.entries.pop(puuid, None)
+        if entry:
+            self.by_name.pop(entry["gamename"].lower(), None)
+            self._remove_sorted(puuid, entry["key"])
+
+    def _remove_sorted(self, puuid, key):
+        i = bisect.bisect_left(self._sorted, (-key, puuid))
+        if i < len(self._sorted) and self._sorted[i] == (-key, puuid):
+            del self._sorted[i]
+
+    def position(self, puuid):
+        entry = self.entries.get(puuid)
+        if not entry:
+            return None
+        return bisect.bisect_left(self._sorted, (-entry["key"], puuid)) + 1
+
+    def position_by_name(self, gamename):
+        puuid = self.by_name.get(gamename.lower())
+        return self.position(puuid) if puuid else None
+
+    def page(self, page=1, per_page=10):
+        pages = max(1, -(-len(self._sorted) // per_page))
+        page = max(1, min(page, pages))
+        start = (page - 1) * per_page
+        rows = [
+            (start + i + 1, self.entries[puuid])
+            for i, (_, puuid) in enumerate(self._sorted[start:start + per_page])
+        ]
+        return rows, page, pages
+
+    def stalest(self, puuids, limit):
+        return sorted(puuids, key=lambda p: self.entries[p]["updated_at"] if p in self.entries else 0)[:limit]
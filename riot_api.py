@@ -0,0 +1,392 @@
+import os
+import time
+import asyncio
+import contextvars
+import aiohttp
+import urllib.parse
+from collections import deque
+from config import Config
+from profiling import timed
+import codec
+from http_cache import HttpCache
+import traffic
+
+champion_cache = {}
+champion_by_key = {}
+latest_version = None
+
+STATIC_CHAMPIONS = {
+    887: {"name": "Briar", "id": "Briar"},
+    895: {"name": "Naafiri", "id": "Naafiri"},
+    950: {"name": "Smolder", "id": "Smolder"},
+    901: {"name": "Aurora", "id": "Aurora"}
+}
+
+# account-v1 est servi à l'identique par tous les clusters: on interroge le plus proche du bot
+ACCOUNT_ROUTING = os.getenv("RIOT_ACCOUNT_ROUTING") or Config.REGION_MAPPING.get(Config.DEFAULT_REGION, "europe")
+VERSIONS_MAX_AGE = 3600
+STATIC_MAX_AGE = 30 * 24 * 3600
+ROTATION_MAX_AGE = 3600
+RIOT_POOL_SIZE = int(os.getenv("RIOT_POOL_SIZE", "10"))
+# Limites de la clé par valeur de routage, "requêtes:secondes" séparées par des virgules
+RIOT_RATE_LIMITS = tuple(
+    tuple(int(x) for x in limit.split(":"))
+    for limit in os.getenv("RIOT_RATE_LIMITS", "20:1,100:120").split(",")
+)
+# Fraction de ces limites accordée à ce processus (les workers reçoivent la leur de WorkerHub.start)
+RIOT_RATE_SHARE = float(os.getenv("RIOT_RATE_SHARE", 1.0))
+
+
+def routing_for(platform):
+    return Config.REGION_MAPPING.get(str(platform).lower(), "europe")
+
+
+def platform_from_match_id(match_id):
+    return str(match_id).split("_", 1)[0].lower()
+
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+# Part du budget de chaque fenêtre réservée aux commandes des utilisateurs
+INTERACTIVE_SHARE = float(os.getenv("RIOT_INTERACTIVE_SHARE", 0.25))
+BACKGROUND_YIELD_SECONDS = 0.05
+
+# Les commandes passent dans la voie interactive (voir before_invoke dans main.py); tout le reste
+# (watcher, classement, ingestion) reste en arrière-plan
+riot_lane = contextvars.ContextVar("riot_lane", default=BACKGROUND)
+
+
+def scaled_limits(limits, share):
+    return tuple((max(1, int(count * share)), period) for count, period in limits)
+
+
+class RateBucket:
+    def __init__(self, limits=RIOT_RATE_LIMITS, interactive_share=INTERACTIVE_SHARE):
+        self.configure(limits, interactive_share)
+        self.windows = [deque() for _ in limits]
+        self.interactive_windows = [deque() for _ in limits]
+        self.blocked_until = 0
+        self.locks = {lane: asyncio.Lock() for lane in LANES}
+        self.waiting = {lane: 0 for lane in LANES}
+        self.wait_stats = {lane: [0, 0.0, 0.0] for lane in LANES}
+
+    def configure(self, limits, interactive_share):
+        self.limits = limits
+        # Sans part interactive (workers de polling), rien n'est réservé
+        self.reserved = [max(1, int(count * interactive_share)) if interactive_share > 0 else 0 for count, _ in limits]
+
+    def _wait_time(self, lane, now):
+        wait = self.blocked_until - now
+        for (count, period), reserved, window, interactive in zip(self.limits, self.reserved, self.windows, self.interactive_windows):
+            for w in (window, interactive):
+                while w and w[0] <= now - period:
+                    w.popleft()
+            limit = count
+            if lane == BACKGROUND:
+                # L'arrière-plan laisse la part réservée, et recule d'autant que la demande interactive la dépasse
+                limit = count - max(reserved, len(interactive) + self.waiting[INTERACTIVE])
+            if limit <= 0:
+                wait = max(wait, BACKGROUND_YIELD_SECONDS)
+            elif len(window) >= limit:
+                wait = max(wait, window[len(window) - limit] + period - now)
+        return wait
+
+    async def acquire(self, lane=None):
+        lane = lane or riot_lane.get()
+        start = time.monotonic()
+        self.waiting[lane] += 1
+        try:
+            async with self.locks[lane]:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(lane, now)
+                    if wait <= 0:
+                        if lane == INTERACTIVE or not self.waiting[INTERACTIVE]:
+                            break
+                        wait = BACKGROUND_YIELD_SECONDS
+                    await asyncio.sleep(wait)
+                for window in self.windows:
+                    window.append(now)
+                if lane == INTERACTIVE:
+                    for window in self.interactive_windows:
+                        window.append(now)
+        finally:
+            self.waiting[lane] -= 1
+
+        waited = time.monotonic() - start
+        stats = self.wait_stats[lane]
+        stats[0] += 1
+        stats[1] += waited
+        stats[2] = max(stats[2], waited)
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RiotAPI:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.sessions = {}
+        self.buckets = {}
+        self.rate_limits = scaled_limits(RIOT_RATE_LIMITS, RIOT_RATE_SHARE)
+        self.interactive_share = INTERACTIVE_SHARE
+        self._cache = None
+
+    def host(self, routing):
+        return f"https://{routing}.api.riotgames.com"
+
+    def session_for(self, routing):
+        session = self.sessions.get(routing)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=RIOT_POOL_SIZE),
+                headers={
+                    "X-Riot-Token": str(self.api_key).strip(),
+                    "User-Agent": "Mozilla/5.0 (Discord Bot)"
+                }
+            )
+            self.sessions[routing] = session
+        return session
+
+    def static_session(self):
+        session = self.sessions.get("ddragon")
+        if session is None or session.closed:
+            session = aiohttp.ClientSession()
+            self.sessions["ddragon"] = session
+        return session
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = HttpCache()
+        return self._cache
+
+    def bucket_for(self, routing):
+        if routing not in self.buckets:
+            self.buckets[routing] = RateBucket(self.rate_limits, self.interactive_share)
+        return self.buckets[routing]
+
+    def set_rate_share(self, share, interactive_share):
+        # share est relatif au budget du processus; les fenêtres déjà entamées sont conservées
+        self.rate_limits = scaled_limits(RIOT_RATE_LIMITS, RIOT_RATE_SHARE * share)
+        self.interactive_share = interactive_share
+        for bucket in self.buckets.values():
+            bucket.configure(self.rate_limits, interactive_share)
+
+    def lane_stats(self):
+        totals = {lane: [0, 0.0, 0.0] for lane in LANES}
+        for bucket in self.buckets.values():
+            for lane, (count, total, worst) in bucket.wait_stats.items():
+                totals[lane][0] += count
+                totals[lane][1] += total
+                totals[lane][2] = max(totals[lane][2], worst)
+        return {
+            lane: {
+                "requests": count,
+                "avg_wait_ms": round(total / count * 1000, 1) if count else 0.0,
+                "max_wait_ms": round(worst * 1000, 1),
+                "waiting": sum(bucket.waiting[lane] for bucket in self.buckets.values()),
+            }
+            for lane, (count, total, worst) in totals.items()
+        }
+
+    async def close(self):
+        for session in self.sessions.values():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+
+    @timed("riot.request")
+    async def request(self, url, max_age=None):
+        try:
+            if '\n' in url or '\r' in url:
+                print(f"URL dangereuse détectée: {repr(url)}")
+                return {"status": {"status_code": 400, "message": "URL invalide"}}
+
+            if max_age is not None:
+                cached = self.cache.fresh(url, max_age)
+                if cached is not None:
+                    return codec.loads(cached)
+
+            routing = urllib.parse.urlsplit(url).hostname.split('.')[0]
+            bucket = self.bucket_for(routing)
+            await bucket.acquire()
+
+            headers = self.cache.validators(url) if max_age is not None else None
+            started = time.monotonic()
+            async with self.session_for(routing).get(traffic.replay_url(url), headers=headers) as response:
+                print(f"API Request: {url}")
+                print(f"Status Code: {response.status}")
+                body = await response.read()
+                if traffic.recorder:
+                    traffic.recorder.record("GET", url, response.status, response.headers, body, started)
+                
+                if response.status == 403:
+                    print("Clé API invalide ou expirée!")
+                    return {"status": {"status_code": 403, "message": "Clé API invalide"}}
+                elif response.status == 404:
+                    print("Ressource non trouvée")
+                    return {"status": {"status_code": 404, "message": "Joueur non trouvé"}}
+                elif response.status == 429:
+                    print("Limite de taux dépassée")
+                    bucket.block(int(response.headers.get("Retry-After", 1)))
+                    return {"status": {"status_code": 429, "message": "Trop de requêtes"}}
+                elif response.status == 304 and max_age is not None:
+                    cached = await self.cache.revalidated(url)
+                    if cached is not None:
+                        return codec.loads(cached)
+                    # Entrée évincée pendant la requête: sans validateurs, le nouvel appel ne peut plus répondre 304
+                    return await self.request(url, max_age)
+                elif response.status != 200:
+                    print(f"Erreur HTTP {response.status}")
+                    return {"status": {"status_code": response.status, "message": f"Erreur HTTP {response.status}"}}
+                
+                if max_age is not None:
+                    await self.cache.store(url, body, response.headers)
+                return codec.loads(body)
+        except Exception as e:
+            print(f"Erreur de requête: {e}")
+            return {"status": {"status_code": 500, "message": f"Erreur réseau: {str(e)}"}}
+
+    async def get_latest_version(self):
+        global latest_version
+        if latest_version:
+            return latest_version
+            
+        try:
+            body = await self.cache.fetch(self.static_session(), "https://ddragon.leagueoflegends.com/api/versions.json", VERSIONS_MAX_AGE)
+            if body:
+                latest_version = codec.loads(body)[0]
+                print(f"Version LoL détectée: {latest_version}")
+                return latest_version
+            return "14.24.1"
+        except Exception as e:
+            print(f"Error getting latest version: {e}")
+            return "14.24.1"
+
+    async def get_champion_data(self):
+        global champion_cache, champion_by_key
+        
+        if champion_cache:
+            return champion_cache
+        
+        try:
+            version = await self.get_latest_version()
+            url = f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion.json"
+            print(f"Récupération champions version {version}")
+            
+            # Les fichiers Data Dragon sont versionnés dans l'URL: une fois en cache, ils ne changent plus
+            body = await self.cache.fetch(self.static_session(), url, STATIC_MAX_AGE)
+            if body:
+                champion_cache = codec.loads(body).get("data", {})
+                champion_by_key = {int(c.get("key", 0)): c for c in champion_cache.values()}
+                print(f"{len(champion_cache)} champions chargés en cache")
+                return champion_cache
+            return {}
+        except Exception as e:
+            print(f"Error getting champion data: {e}")
+            return {}
+
+    async def find_champion_by_id(self, champion_id):
+        if champion_id == 0:
+            return {
+                "name": "Inconnu",
+                "id": "Unknown",
+                "icon_url": "https://ddragon.leagueoflegends.com/cdn/14.24.1/img/profileicon/29.png"
+            }
+        
+        await self.get_champion_data()
+        version = await self.get_latest_version()
+        
+        champion_info = champion_by_key.get(champion_id)
+        if champion_info:
+            return {
+                "name": champion_info.get("name", "Champion Inconnu"),
+                "id": champion_info.get("id", "Unknown"),
+                "icon_url": f"https://ddragon.leagueoflegends.com/cdn/{version}/img/champion/{champion_info.get('id', 'Unknown')}.png"
+            }
+        
+        if champion_id in STATIC_CHAMPIONS:
+            champ_info = STATIC_CHAMPIONS[champion_id]
+            return {
+                "name": champ_info["name"],
+                "id": champ_info["id"],
+                "icon_url": f"https://ddragon.leagueoflegends.com/cdn/{version}/img/champion/{champ_info['id']}.png"
+            }
+        
+        return {
+            "name": f"Champion #{champion_id}",
+            "id": "Unknown",
+            "icon_url": f"https://ddragon.leagueoflegends.com/cdn/{version}/img/profileicon/29.png"
+        }
+        
+    def validate_player_input(self, gamename_with_tag):
+        if not gamename_with_tag or "#" not in gamename_with_tag:
+            return None, None, "Format incorrect. Utilisez: NomJoueur#TAG"
+        
+        try:
+            parts = gamename_with_tag.strip().split("#")
+            if len(parts) != 2:
+                return None, None, "Format incorrect. Un seul # autorisé."
+            
+            gamename = parts[0].strip()
+            tagline = parts[1].strip()
+            
+            if not gamename or not tagline:
+                return None, None, "Le nom et le tag ne peuvent pas être vides."
+            
+            if len(gamename) > 16 or len(tagline) > 5:
+                return None, None, "Nom trop long (max 16 caractères) ou tag trop long (max 5)."
+            
+            forbidden_chars = ['\n', '\r', '\t', '\0']
+            for char in forbidden_chars:
+                if char in gamename or char in tagline:
+                    return None, None, "Caractères interdits détectés."
+            
+            return gamename, tagline, None
+            
+        except Exception as e:
+            return None, None, f"Erreur de validation: {str(e)}"
+
+    async def get_summoner_by_riot_id(self, gameName, tagLine):
+        gameName = urllib.parse.quote(str(gameName).strip().replace('\n', '').replace('\r', ''), safe='')
+        tagLine = urllib.parse.quote(str(tagLine).strip().replace('\n', '').replace('\r', ''), safe='')
+        
+        if not gameName or not tagLine:
+            return {"status": {"status_code": 400, "message": "Nom de joueur ou tag invalide"}}
+        
+        url = f"{self.host(ACCOUNT_ROUTING)}/riot/account/v1/accounts/by-riot-id/{gameName}/{tagLine}"
+        return await self.request(url)
+
+    async def get_summoner_by_puuid(self, encryptedPUUID, region):
+        url = f"https://{region}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{encryptedPUUID}"
+        return await self.request(url)
+
+    async def get_league_by_summoner(self, encryptedSummonerId, region):
+        url = f"https://{region}.api.riotgames.com/lol/league/v4/entries/by-summoner/{encryptedSummonerId}"
+        return await self.request(url)
+
+    async def get_league_by_puuid(self, encryptedPUUID, region):
+        url = f"https://{region}.api.riotgames.com/lol/league/v4/entries/by-puuid/{encryptedPUUID}"
+        return await self.request(url)
+
+    async def get_match_history(self, encryptedPUUID, start=0, count=10, region="euw1"):
+        url = f"{self.host(routing_for(region))}/lol/match/v5/matches/by-puuid/{encryptedPUUID}/ids?start={start}&count={count}&queue=420"
+        return await self.request(url)
+    
+    async def get_match_history_all_queues(self, encryptedPUUID, start=0, count=10, region="euw1"):
+        url = f"{self.host(routing_for(region))}/lol/match/v5/matches/by-puuid/{encryptedPUUID}/ids?start={start}&count={count}"
+        return await self.request(url)
+
+    async def get_match(self, matchId):
+        url = f"{self.host(routing_for(platform_from_match_id(matchId)))}/lol/match/v5/matches/{matchId}"
+        return await self.request(url)
+
+    async def get_live_game(self, encryptedPUUID, region):
+        url = f"https://{region}.api.riotgames.com/lol/spectator/v5/active-games/by-summoner/{encryptedPUUID}"
+        return await self.request(url)
+
+    async def get_free_champion_rotation(self, region="euw1"):
+        url = f"{self.host(region)}/lol/platform/v3/champion-rotations"
+        return await self.request(url, max_age=ROTATION_MAX_AGE)
@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import threading
+
+import codec
+
+POSITIVE_TTL = 7 * 24 * 3600
+NEGATIVE_TTL = 10 * 60
+
+
+class RiotIdResolver:
+    def __init__(self, riot_api, path=None, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.riot_api = riot_api
+        self.path = path or os.path.join('data', 'riot_ids.json')
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+        self._write_lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def normalize(gamename, tagline):
+        return f"{str(gamename).strip().lower()}#{str(tagline).strip().lower()}"
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                now = time.time()
+                self.entries = {k: v for k, v in codec.load_file(self.path).items() if v["expires_at"] > now}
+        except Exception as e:
+            print("Erreur chargement cache Riot ID:", e)
+            self.entries = {}
+
+    async def _save(self):
+        # Purge et copie sur la boucle, écriture disque dans un thread
+        now = time.time()
+        self.entries = {k: v for k, v in self.entries.items() if v["expires_at"] > now}
+        await asyncio.to_thread(self._write, {k: dict(v) for k, v in self.entries.items()})
+
+    def _write(self, entries):
+        try:
+            with self._write_lock:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                codec.dump_file(entries, self.path)
+        except Exception as e:
+            print("Erreur sauvegarde cache Riot ID:", e)
+
+    def lookup(self, gamename, tagline):
+        entry = self.entries.get(self.normalize(gamename, tagline))
+        if entry and entry["expires_at"] > time.time():
+            return entry
+        return None
+
+    async def resolve(self, gamename, tagline, region=None):
+        key = self.normalize(gamename, tagline)
+        entry = self.lookup(gamename, tagline)
+        if entry:
+            self.hits += 1
+            if entry.get("missing"):
+                return {"status": dict(entry["status"])}
+            if region and entry.get("region") != region:
+                entry["region"] = region
+                await self._save()
+            return dict(entry["account"])
+
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            account = await self.riot_api.get_summoner_by_riot_id(gamename, tagline)
+            if "status" in account:
+                if account["status"].get("status_code") == 404:
+                    self.entries[key] = {
+                        "missing": True,
+                        "status": account["status"],
+                        "expires_at": time.time() + self.negative_ttl
+                    }
+            elif "puuid" in account:
+                self.entries[key] = {
+                    "account": account,
+                    "region": region,
+                    "expires_at": time.time() + self.positive_ttl
+                }
+            future.set_result(account)
+            if key in self.entries:
+                await self._save()
+            return account
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            # Tâche propriétaire annulée: les autres attentes sur ce Riot ID ne doivent pas rester bloquées
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, nodes=(), replicas=64):
+        self.replicas = replicas
+        self._ring = []
+        self._owners = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self):
+        return sorted(set(self._owners.values()))
+
+    def add_node(self, node):
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._ring, point)
+                self._owners[point] = node
+
+    def remove_node(self, node):
+        points = [p for p, owner in self._owners.items() if owner == node]
+        for point in points:
+            del self._owners[point]
+            del self._ring[bisect.bisect_left(self._ring, point)]
+
+    def node_for(self, key):
+        if not self._ring:
+            return None
+        i = bisect.bisect(self._ring, _hash(str(key))) % len(self._ring)
+        return self._owners[self._ring[i]]
+
+    def partition(self, keys):
+        shares = {node: [] for node in self.nodes}
+        for key in keys:
+            node = self.node_for(key)
+            if node is not None:
+                shares[node].append(key)
+        return shares
@@ -0,0 +1,76 @@
+import os
+import mmap
+import zlib
+import pickle
+import struct
+
+MAGIC = b"ALPSNAP\0"
+FORMAT_VERSION = 1
+# Version du schéma de l'état: incrémenter et ajouter une migration dans MIGRATIONS quand sa forme change
+SCHEMA_VERSION = 1
+MIGRATIONS = {}
+
+# magic, version du format, version du schéma, drapeaux, taille du payload, crc32 du payload
+HEADER = struct.Struct("<8sHHIQI")
+FLAG_CLEAN = 1
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    # L'état ne contient que des types de base: aucun import de classe n'est autorisé au chargement
+    def find_class(self, module, name):
+        raise SnapshotError(f"Type interdit dans le snapshot: {module}.{name}")
+
+
+def encode_snapshot(state, clean=False):
+    payload = pickle.dumps(state, protocol=5)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, SCHEMA_VERSION, FLAG_CLEAN if clean else 0, len(payload), zlib.crc32(payload))
+    return header + payload
+
+
+def write_snapshot(path, data):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def read_snapshot(path):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < HEADER.size:
+            raise SnapshotError("Snapshot tronqué")
+        magic, format_version, schema_version, flags, length, checksum = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            raise SnapshotError("Fichier de snapshot invalide")
+        if format_version != FORMAT_VERSION:
+            raise SnapshotError(f"Format de snapshot {format_version} non supporté")
+        if HEADER.size + length != len(mm):
+            raise SnapshotError("Taille du snapshot incohérente")
+
+        payload = memoryview(mm)[HEADER.size:]
+        try:
+            valid = zlib.crc32(payload) == checksum
+        finally:
+            payload.release()
+        if not valid:
+            raise SnapshotError("Checksum du snapshot invalide")
+        # Le mmap sert directement de fichier au unpickler: pas de copie intermédiaire du payload
+        mm.seek(HEADER.size)
+        state = _PlainUnpickler(mm).load()
+
+    while schema_version < SCHEMA_VERSION:
+        if schema_version not in MIGRATIONS:
+            raise SnapshotError(f"Pas de migration depuis le schéma {schema_version}")
+        state = MIGRATIONS[schema_version](state)
+        schema_version += 1
+    if schema_version > SCHEMA_VERSION:
+        raise SnapshotError(f"Schéma {schema_version} plus récent que le code ({SCHEMA_VERSION})")
+    return state, bool(flags & FLAG_CLEAN)
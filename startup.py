@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+
+import discord
+
+LEAN_CLIENT = os.getenv("LEAN_CLIENT", "0") == "1"
+LEAN_MAX_MESSAGES = int(os.getenv("DISCORD_MAX_MESSAGES", 100))
+
+
+def client_options(lean=LEAN_CLIENT, max_messages=LEAN_MAX_MESSAGES):
+    if not lean:
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.guilds = True
+        intents.reactions = True
+        return {"intents": intents}
+
+    # Seuls les intents utilisés: salons et rôles (guilds), commandes préfixées (messages + contenu)
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    return {
+        "intents": intents,
+        # discord.py remplace 0 par 1000: None désactive réellement le cache de messages
+        "max_messages": max_messages or None,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+    }
+
+
+def message_handle(message):
+    # Ne garde que salon + id: un Message complet retient auteur, embeds et pièces jointes
+    return message.channel.get_partial_message(message.id)
+
+
+def command_tree_hash(tree):
+    payload = []
+    for cmd in sorted(tree.get_commands(), key=lambda c: c.name):
+        try:
+            payload.append(cmd.to_dict(tree))
+        except TypeError:
+            payload.append(cmd.to_dict())
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+async def sync_command_tree(tree, hash_file=os.path.join('data', 'command_tree.sha256')):
+    current = command_tree_hash(tree)
+    try:
+        with open(hash_file, 'r', encoding='utf-8') as f:
+            previous = f.read().strip()
+    except OSError:
+        previous = None
+
+    if previous == current:
+        print("Arbre de commandes inchangé, synchronisation ignorée")
+        return None
+
+    synced = await tree.sync()
+    print(f'{len(synced)} commandes synchronisées globalement!')
+    os.makedirs(os.path.dirname(hash_file) or '.', exist_ok=True)
+    with open(hash_file, 'w', encoding='utf-8') as f:
+        f.write(current)
+    return synced
+
+
+class StartupManager:
+    def __init__(self):
+        self.started = False
+        self.stages = {}
+        self.timings = {}
+        self.errors = {}
+        self.t0 = None
+
+    def stage(self, name, func, after=()):
+        async def run():
+            start = time.perf_counter()
+            try:
+                for dependency in after:
+                    await asyncio.shield(self.stages[dependency])
+                start = time.perf_counter()
+                return await func()
+            except Exception as e:
+                self.errors[name] = str(e)
+                print(f"Étape de démarrage '{name}' en échec: {e}")
+                raise
+            finally:
+                self.timings[name] = {
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "ready_at_ms": round((time.perf_counter() - self.t0) * 1000, 1)
+                }
+
+        if self.t0 is None:
+            self.t0 = time.perf_counter()
+        self.stages[name] = asyncio.create_task(run())
+        return self.stages[name]
+
+    async def wait(self):
+        await asyncio.gather(*self.stages.values(), return_exceptions=True)
+        return self.timings
+
+    def report(self):
+        lines = ["TEMPS DE DÉMARRAGE PAR ÉTAPE:"]
+        for name, timing in sorted(self.timings.items(), key=lambda item: item[1]["ready_at_ms"]):
+            status = "KO" if name in self.errors else "OK"
+            lines.append(f"  {name}: {timing['duration_ms']} ms (prêt à +{timing['ready_at_ms']} ms) {status}")
+        return "\n".join(lines)
@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from profiling import LoopLagMonitor
+
+
+def blocking_save():
+    # Simule un appel synchrone (psycopg2, json.dump) exécuté directement sur la boucle
+    time.sleep(0.5)
+
+
+async def run_with_block(block):
+    monitor = LoopLagMonitor(interval=0.05, threshold=0.2)
+    monitor.start()
+    await asyncio.sleep(0.3)
+    if block:
+        blocking_save()
+    await asyncio.sleep(0.3)
+    monitor.stop()
+    return monitor.snapshot()
+
+
+def test_blocking_callback_is_reported_over_threshold():
+    snapshot = asyncio.run(run_with_block(True))
+    assert snapshot["max_lag_ms"] > 200
+    caught = [e for e in snapshot["blocking_events"] if "blocking_save" in e["stack"]]
+    assert caught, snapshot["blocking_events"]
+    assert caught[0]["lag_ms"] > 200
+
+
+def test_idle_loop_reports_no_blocking():
+    snapshot = asyncio.run(run_with_block(False))
+    assert snapshot["max_lag_ms"] < 200
+    assert not snapshot["blocking_events"]
@@ -0,0 +1,167 @@
+import os
+import gzip
+import time
+import asyncio
+import argparse
+import urllib.parse
+from collections import defaultdict, deque
+
+import codec
+
+# TRAFFIC_RECORD=chemin.jsonl.gz enregistre les échanges Riot/Twitch;
+# TRAFFIC_REPLAY_URL=http://127.0.0.1:8780 redirige les clients vers un serveur de rejeu
+TRAFFIC_RECORD = os.getenv("TRAFFIC_RECORD")
+TRAFFIC_REPLAY_URL = os.getenv("TRAFFIC_REPLAY_URL")
+REPLAY_HOST = "127.0.0.1"
+REPLAY_PORT = int(os.getenv("TRAFFIC_REPLAY_PORT", 8780))
+FLUSH_EVERY = 100
+
+# Les paramètres et en-têtes d'authentification ne sont jamais écrits dans une capture
+SCRUBBED_PARAMS = {"api_key", "client_id", "client_secret"}
+KEPT_HEADERS = ("Content-Type", "Retry-After", "ETag", "Last-Modified",
+                "X-App-Rate-Limit", "X-App-Rate-Limit-Count", "X-Method-Rate-Limit", "X-Method-Rate-Limit-Count")
+
+
+def scrub_url(url):
+    parts = urllib.parse.urlsplit(str(url))
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SCRUBBED_PARAMS]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def capture_path_for(name):
+    # Une capture par processus (workers de polling): les flux gzip ne supportent pas d'écritures concurrentes
+    base, suffix = (TRAFFIC_RECORD[:-len(".jsonl.gz")], ".jsonl.gz") if TRAFFIC_RECORD.endswith(".jsonl.gz") else os.path.splitext(TRAFFIC_RECORD)
+    return f"{base}.{name}{suffix}"
+
+
+def replay_url(url):
+    # https://euw1.api.riotgames.com/lol/... -> {TRAFFIC_REPLAY_URL}/euw1.api.riotgames.com/lol/...
+    if not TRAFFIC_REPLAY_URL:
+        return url
+    parts = urllib.parse.urlsplit(url)
+    return f"{TRAFFIC_REPLAY_URL.rstrip('/')}/{parts.hostname}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+class TrafficRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self.count = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = gzip.open(path, 'ab')
+        print(f"Enregistrement du trafic API dans {path}")
+
+    def record(self, method, url, status, headers, body, started):
+        if self._file is None:
+            return
+        entry = {
+            "t": round(started - self.started, 4),
+            "method": method,
+            "url": scrub_url(url),
+            "status": status,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "headers": {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            "body": body.decode('utf-8', errors='replace') if body else "",
+        }
+        self._file.write(codec.dumps(entry) + b"\n")
+        self.count += 1
+        # Un processus tué garde ainsi une capture lisible jusqu'au dernier flush
+        if self.count % FLUSH_EVERY == 0:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            print(f"Capture de trafic fermée: {self.count} échange(s) dans {self.path}")
+
+
+recorder = TrafficRecorder(TRAFFIC_RECORD) if TRAFFIC_RECORD else None
+
+
+def load_capture(path):
+    entries = []
+    try:
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    entries.append(codec.loads(line))
+    except EOFError:
+        print(f"Capture {path} tronquée, {len(entries)} échange(s) récupéré(s)")
+    return entries
+
+
+class ReplayServer:
+    # Sert les réponses capturées par (méthode, URL), dans l'ordre d'enregistrement: la dernière réponse
+    # d'une URL reste servie une fois la séquence épuisée. La latence d'origine est divisée par speed.
+    def __init__(self, entries, speed=1.0):
+        self.speed = speed
+        self.responses = defaultdict(deque)
+        for entry in entries:
+            self.responses[(entry["method"], self._key(entry["url"]))].append(entry)
+        self.served = 0
+        self.unmatched = 0
+        self.runner = None
+
+    @staticmethod
+    def _key(url):
+        parts = urllib.parse.urlsplit(url)
+        query = sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+        return f"{parts.hostname}{parts.path}?{urllib.parse.urlencode(query)}"
+
+    async def handle(self, request):
+        from aiohttp import web
+        host, _, path = request.path.lstrip('/').partition('/')
+        if host == "id.twitch.tv" and request.method == "POST":
+            # Le token n'est jamais capturé: le rejeu en fournit un factice
+            return web.json_response({"access_token": "replay", "expires_in": 3600 * 24, "token_type": "bearer"})
+
+        url = scrub_url(f"https://{host}/{path}" + (f"?{request.query_string}" if request.query_string else ""))
+        queue = self.responses.get((request.method, self._key(url)))
+        if not queue:
+            self.unmatched += 1
+            return web.json_response({"status": {"status_code": 404, "message": "Absent de la capture"}}, status=404)
+
+        entry = queue.popleft() if len(queue) > 1 else queue[0]
+        if entry["elapsed_ms"] and self.speed > 0:
+            await asyncio.sleep(entry["elapsed_ms"] / 1000 / self.speed)
+        self.served += 1
+        return web.Response(status=entry["status"], body=entry["body"].encode('utf-8'), headers=entry["headers"])
+
+    async def start(self, host=REPLAY_HOST, port=REPLAY_PORT):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        print(f"Serveur de rejeu sur http://{host}:{port} ({sum(len(q) for q in self.responses.values())} réponses, x{self.speed})")
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+async def serve(path, speed, host, port):
+    server = ReplayServer(load_capture(path), speed)
+    await server.start(host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print(f"Rejeu terminé: {server.served} réponse(s) servie(s), {server.unmatched} requête(s) sans correspondance")
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rejeu local d'une capture de trafic Riot/Twitch")
+    parser.add_argument('capture')
+    parser.add_argument('--speed', type=float, default=1.0, help="facteur d'accélération des latences (0 = sans délai)")
+    parser.add_argument('--host', default=REPLAY_HOST)
+    parser.add_argument('--port', type=int, default=REPLAY_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.capture, args.speed, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
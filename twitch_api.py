@@ -0,0 +1,76 @@
+import os
+import time
+import aiohttp
+from datetime import datetime, UTC
+from profiling import timed
+import codec
+import traffic
+
+TWITCH_CLIENT_ID = os.getenv("TWITCH_CLIENT_ID")
+TWITCH_CLIENT_SECRET = os.getenv("TWITCH_CLIENT_SECRET")
+
+class TwitchAPI:
+    def __init__(self):
+        self.token = None
+        self.headers = {}
+        self.token_expires_at = None
+
+    async def get_token(self):
+        if not TWITCH_CLIENT_ID or not TWITCH_CLIENT_SECRET:
+            print("Variables Twitch manquantes, fonctionnalités Twitch désactivées")
+            return
+        url = "https://id.twitch.tv/oauth2/token"
+        params = {
+            'client_id': TWITCH_CLIENT_ID,
+            'client_secret': TWITCH_CLIENT_SECRET,
+            'grant_type': 'client_credentials'
+        }
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(traffic.replay_url(url), params=params) as resp:
+                    data = await resp.json(loads=codec.loads)
+                    self.token = data['access_token']
+                    self.token_expires_at = datetime.now(UTC).timestamp() + data['expires_in']
+                    self.headers = {
+                        'Client-ID': TWITCH_CLIENT_ID,
+                        'Authorization': f'Bearer {self.token}'
+                    }
+        except Exception as e:
+            print(f"Erreur Twitch API: {e}")
+
+    async def ensure_valid_token(self):
+        if not self.token or datetime.now(UTC).timestamp() >= self.token_expires_at - 300:
+            await self.get_token()
+
+    async def _get_batched(self, url, param, values):
+        if not self.token:
+            return []
+        await self.ensure_valid_token()
+        results = []
+        for i in range(0, len(values), 100):
+            params = [(param, str(v)) for v in values[i:i+100]]
+            try:
+                started = time.monotonic()
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(traffic.replay_url(url), headers=self.headers, params=params) as response:
+                        body = await response.read()
+                        if traffic.recorder:
+                            traffic.recorder.record("GET", f"{url}?{response.url.query_string}", response.status, response.headers, body, started)
+                        if response.status == 200:
+                            results.extend(codec.loads(body)['data'])
+            except Exception as e:
+                print(f"Erreur requête Twitch {url}: {e}")
+        return results
+
+    @timed("twitch.get_users")
+    async def get_users(self, logins=(), ids=()):
+        users = await self._get_batched("https://api.twitch.tv/helix/users", 'login', list(logins))
+        return users + await self._get_batched("https://api.twitch.tv/helix/users", 'id', list(ids))
+
+    @timed("twitch.get_games")
+    async def get_games(self, ids):
+        return await self._get_batched("https://api.twitch.tv/helix/games", 'id', list(ids))
+
+    @timed("twitch.get_streams")
+    async def get_streams(self, user_ids):
+        return await self._get_batched("https://api.twitch.tv/helix/streams", 'user_id', list(user_ids))
@@ -0,0 +1,80 @@
+import os
+import time
+
+import codec
+
+USER_TTL = 7 * 24 * 3600
+GAME_TTL = 30 * 24 * 3600
+# Les ids inconnus de Twitch (compte supprimé, jeu retiré) ne sont redemandés qu'après ce délai
+MISSING_TTL = 24 * 3600
+USER_FIELDS = ("login", "display_name", "profile_image_url")
+GAME_FIELDS = ("name", "box_art_url")
+
+
+class TwitchMetadataCache:
+    def __init__(self, twitch_api, path=None, user_ttl=USER_TTL, game_ttl=GAME_TTL):
+        self.twitch_api = twitch_api
+        self.path = path or os.path.join('data', 'twitch_metadata.json')
+        self.ttls = {"users": user_ttl, "games": game_ttl}
+        # {"users": {id: [expiration, données ou None]}, "games": {...}}
+        self.entries = {"users": {}, "games": {}}
+        self.api_calls = 0
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                data = codec.load_file(self.path)
+                for kind in self.entries:
+                    self.entries[kind] = {str(k): v for k, v in data.get(kind, {}).items()}
+        except Exception as e:
+            print("Erreur chargement cache métadonnées Twitch:", e)
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            codec.dump_file(self.entries, self.path)
+        except Exception as e:
+            print("Erreur sauvegarde cache métadonnées Twitch:", e)
+
+    def _stale_ids(self, kind, ids, now):
+        entries = self.entries[kind]
+        return sorted({str(i) for i in ids if i and (str(i) not in entries or entries[str(i)][0] <= now)})
+
+    def _store(self, kind, requested, items, fields, now):
+        if not items:
+            # Réponse vide = erreur Twitch (les ids viennent de streams en cours): nouvel essai au prochain tick
+            return
+        found = {item['id']: {f: item.get(f) for f in fields} for item in items}
+        for item_id in requested:
+            data = found.get(item_id)
+            ttl = self.ttls[kind] if data else MISSING_TTL
+            # Une entrée périmée reste servie si Twitch ne renvoie plus cet id
+            if data is None and item_id in self.entries[kind] and self.entries[kind][item_id][1]:
+                data = self.entries[kind][item_id][1]
+            self.entries[kind][item_id] = [now + ttl, data]
+
+    async def refresh(self, streams):
+        # Seuls les ids absents ou expirés sont demandés: en régime établi, aucun appel supplémentaire par tick
+        now = time.time()
+        user_ids = self._stale_ids("users", (s.get('user_id') for s in streams), now)
+        game_ids = self._stale_ids("games", (s.get('game_id') for s in streams), now)
+        if user_ids:
+            self.api_calls += (len(user_ids) + 99) // 100
+            self._store("users", user_ids, await self.twitch_api.get_users(ids=user_ids), USER_FIELDS, now)
+        if game_ids:
+            self.api_calls += (len(game_ids) + 99) // 100
+            self._store("games", game_ids, await self.twitch_api.get_games(game_ids), GAME_FIELDS, now)
+        if user_ids or game_ids:
+            self._save()
+
+    def user(self, user_id):
+        entry = self.entries["users"].get(str(user_id))
+        return entry[1] if entry else None
+
+    def game(self, game_id):
+        entry = self.entries["games"].get(str(game_id))
+        return entry[1] if entry else None
+
+    def stats(self):
+        return {"users": len(self.entries["users"]), "games": len(self.entries["games"]), "api_calls": self.api_calls}
@@ -0,0 +1,62 @@
+import os
+
+import codec
+
+
+class TwitchUserResolver:
+    def __init__(self, twitch_api, path=None):
+        self.twitch_api = twitch_api
+        self.path = path or os.path.join('data', 'twitch_users.json')
+        self.by_id = {}
+        self.by_login = {}
+        self._load()
+
+    @staticmethod
+    def normalize(login):
+        return login.lower().replace('@', '').strip()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                for user_id, login in codec.load_file(self.path).items():
+                    self.by_id[int(user_id)] = login
+                    self.by_login[login] = int(user_id)
+        except Exception as e:
+            print("Erreur chargement cache utilisateurs Twitch:", e)
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            codec.dump_file({str(k): v for k, v in self.by_id.items()}, self.path)
+        except Exception as e:
+            print("Erreur sauvegarde cache utilisateurs Twitch:", e)
+
+    def remember(self, user_id, login):
+        user_id, login = int(user_id), self.normalize(login)
+        previous = self.by_id.get(user_id)
+        if previous == login:
+            return False
+        if previous is not None:
+            print(f"Chaîne Twitch renommée: {previous} -> {login}")
+            self.by_login.pop(previous, None)
+        self.by_id[user_id] = login
+        self.by_login[login] = user_id
+        return True
+
+    def remember_streams(self, streams):
+        if any([self.remember(s['user_id'], s['user_login']) for s in streams]):
+            self._save()
+
+    def login_for(self, user_id):
+        return self.by_id.get(int(user_id))
+
+    async def resolve_logins(self, logins):
+        logins = [self.normalize(login) for login in logins]
+        missing = sorted({login for login in logins if login and login not in self.by_login})
+        if missing:
+            users = await self.twitch_api.get_users(logins=missing)
+            for user in users:
+                self.remember(user['id'], user['login'])
+            if users:
+                self._save()
+        return {login: self.by_login[login] for login in logins if login in self.by_login}
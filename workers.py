@@ -0,0 +1,293 @@
+import os
+import sys
+import asyncio
+import argparse
+
+import codec
+import traffic
+from sharding import HashRing
+
+WORKER_IPC_HOST = '127.0.0.1'
+WORKER_IPC_PORT = int(os.getenv('WORKER_IPC_PORT', 8765))
+PLAYER_POLL_SECONDS = 300
+STREAM_POLL_SECONDS = 120
+POLL_RETRY_SECONDS = 30
+# Délai avant relance d'un worker mort, doublé à chaque échec rapproché
+RESTART_DELAY_SECONDS = 1
+RESTART_MAX_DELAY_SECONDS = 60
+LIVE_GAME_FIELDS = ("gameId", "gameQueueConfigId", "gameLength", "platformId")
+PARTICIPANT_FIELDS = ("puuid", "teamId", "championId", "summonerId", "riotId")
+
+
+def shard_name(index):
+    return f"worker-{index}"
+
+
+def rate_shares(shard_count, interactive_share):
+    # Le budget d'arrière-plan est réparti entre les workers et la passerelle (classement, ingestion, rangs des
+    # parties); la passerelle garde en plus la réserve interactive des commandes
+    background = (1 - interactive_share) / (shard_count + 1)
+    return interactive_share + background, background
+
+
+def compact_live_game(live_game):
+    if "status" in live_game:
+        return None
+    game = {k: live_game[k] for k in LIVE_GAME_FIELDS if k in live_game}
+    game["participants"] = [
+        {k: p[k] for k in PARTICIPANT_FIELDS if k in p}
+        for p in live_game.get("participants", [])
+    ]
+    return game
+
+
+async def send_message(writer, message):
+    writer.write(codec.dumps(message) + b"\n")
+    await writer.drain()
+
+
+class WorkerHub:
+    def __init__(self, shard_count, interactive_share, host=WORKER_IPC_HOST, port=WORKER_IPC_PORT):
+        self.shard_count = shard_count
+        self.gateway_share, self.worker_share = rate_shares(shard_count, interactive_share)
+        self.host = host
+        self.port = port
+        self.ring = HashRing(shard_name(i) for i in range(shard_count))
+        self.writers = {}
+        self.sent = {}
+        self.players = []
+        self.streamers = []
+        self.server = None
+        self.processes = {}
+        self.supervisors = []
+        self.on_live_games = None
+        self.on_streams = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        for i in range(self.shard_count):
+            await self._spawn(i)
+        self.supervisors = [asyncio.create_task(self._supervise(i)) for i in range(self.shard_count)]
+        print(f"{self.shard_count} worker(s) de polling lancés (IPC {self.host}:{self.port})")
+
+    async def _spawn(self, index):
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workers.py')
+        # Sans cette part, chaque worker s'accorderait le budget complet de la clé
+        env = dict(os.environ, RIOT_INTERACTIVE_SHARE="0",
+                   RIOT_RATE_SHARE=str(float(os.getenv("RIOT_RATE_SHARE", 1.0)) * self.worker_share))
+        if traffic.TRAFFIC_RECORD:
+            env["TRAFFIC_RECORD"] = traffic.capture_path_for(shard_name(index))
+        self.processes[index] = await asyncio.create_subprocess_exec(
+            sys.executable, script,
+            '--shard', str(index), '--shards', str(self.shard_count),
+            '--host', self.host, '--port', str(self.port),
+            env=env
+        )
+
+    async def _supervise(self, index):
+        # Personne d'autre ne sonde le shard d'un worker (game_watcher et check_streams s'effacent): il est relancé
+        delay = RESTART_DELAY_SECONDS
+        while True:
+            started = asyncio.get_running_loop().time()
+            code = await self.processes[index].wait()
+            if asyncio.get_running_loop().time() - started > RESTART_MAX_DELAY_SECONDS:
+                delay = RESTART_DELAY_SECONDS
+            print(f"Worker {shard_name(index)} arrêté (code {code}), relance dans {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESTART_MAX_DELAY_SECONDS)
+            try:
+                await self._spawn(index)
+            except Exception as e:
+                print(f"Erreur relance worker {shard_name(index)}: {e}")
+
+    async def stop(self):
+        for task in self.supervisors:
+            task.cancel()
+        await asyncio.gather(*self.supervisors, return_exceptions=True)
+        self.supervisors = []
+        for process in self.processes.values():
+            if process.returncode is None:
+                process.terminate()
+        for process in self.processes.values():
+            await process.wait()
+        self.processes = {}
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader, writer):
+        shard = None
+        try:
+            while line := await reader.readline():
+                message = codec.loads(line)
+                if message["type"] == "hello":
+                    shard = shard_name(message["shard"])
+                    self.writers[shard] = writer
+                    self.sent.pop(shard, None)
+                    await self._send_assignment(shard)
+                    print(f"Worker {shard} connecté")
+                elif message["type"] == "live_games" and self.on_live_games:
+                    await self.on_live_games(message["results"])
+                elif message["type"] == "streams" and self.on_streams:
+                    await self.on_streams(message["user_ids"], message["streams"])
+        except Exception as e:
+            print(f"Erreur IPC worker {shard}: {e}")
+        finally:
+            if shard and self.writers.get(shard) is writer:
+                del self.writers[shard]
+                print(f"Worker {shard} déconnecté")
+            writer.close()
+
+    async def assign_players(self, players):
+        self.players = players
+        await self._broadcast()
+
+    async def assign_streamers(self, streamers):
+        self.streamers = streamers
+        await self._broadcast()
+
+    async def _broadcast(self):
+        for shard in list(self.writers):
+            await self._send_assignment(shard)
+
+    async def _send_assignment(self, shard):
+        assignment = {
+            "type": "assign",
+            "players": [p for p in self.players if self.ring.node_for(p["puuid"]) == shard],
+            "streamers": [s for s in self.streamers if self.ring.node_for(s) == shard],
+        }
+        if self.sent.get(shard) == assignment:
+            return
+        try:
+            await send_message(self.writers[shard], assignment)
+            self.sent[shard] = assignment
+        except Exception as e:
+            print(f"Erreur envoi assignation {shard}: {e}")
+
+
+async def wait_for_assignment(changed, timeout):
+    # Réveil anticipé dès qu'une nouvelle assignation arrive, sinon à l'échéance de l'intervalle
+    try:
+        await asyncio.wait_for(changed.wait(), max(0, timeout))
+    except asyncio.TimeoutError:
+        pass
+
+
+def next_batch(entries, key, polled, deadline, interval):
+    # Passe complète à l'échéance; entre deux, seules les entrées nouvellement assignées sont interrogées
+    now = asyncio.get_running_loop().time()
+    if now >= deadline:
+        return entries, now + interval
+    return [e for e in entries if key(e) not in polled], deadline
+
+
+async def poll_players(riot, assignment, writer, changed):
+    polled, deadline = set(), 0
+    while True:
+        changed.clear()
+        players, deadline = next_batch(assignment["players"], lambda p: p["puuid"], polled, deadline, PLAYER_POLL_SECONDS)
+        polled = {p["puuid"] for p in assignment["players"]}
+        assigned = {p["puuid"] for p in players}
+        results = {}
+        retry = None
+        try:
+            for player in players:
+                if player["puuid"] in results:
+                    continue
+                live_game = compact_live_game(await riot.get_live_game(player["puuid"], player["region"]))
+                results[player["puuid"]] = live_game
+                if live_game:
+                    for participant in live_game["participants"]:
+                        if participant.get("puuid") in assigned:
+                            results[participant["puuid"]] = live_game
+        except Exception as e:
+            # Les joueurs non sondés sont repris au prochain essai, sans attendre la passe complète suivante
+            print(f"Erreur polling joueurs: {e}")
+            polled -= assigned - set(results)
+            retry = POLL_RETRY_SECONDS
+        if results:
+            await send_message(writer, {"type": "live_games", "results": results})
+        timeout = deadline - asyncio.get_running_loop().time()
+        await wait_for_assignment(changed, min(timeout, retry) if retry else timeout)
+
+
+async def poll_streams(twitch, assignment, writer, changed):
+    await twitch.get_token()
+    polled, deadline = set(), 0
+    while True:
+        changed.clear()
+        user_ids, deadline = next_batch(assignment["streamers"], lambda u: u, polled, deadline, STREAM_POLL_SECONDS)
+        polled = set(assignment["streamers"])
+        retry = None
+        if user_ids:
+            try:
+                streams = await twitch.get_streams(user_ids)
+            except Exception as e:
+                print(f"Erreur polling streams: {e}")
+                polled -= set(user_ids)
+                retry = POLL_RETRY_SECONDS
+            else:
+                await send_message(writer, {"type": "streams", "user_ids": user_ids, "streams": streams})
+        timeout = deadline - asyncio.get_running_loop().time()
+        await wait_for_assignment(changed, min(timeout, retry) if retry else timeout)
+
+
+async def run_worker(shard, shards, host, port):
+    from riot_api import RiotAPI
+    from twitch_api import TwitchAPI
+
+    riot = RiotAPI(os.getenv("RIOT_API_KEY"))
+    twitch = TwitchAPI()
+    assignment = {"players": [], "streamers": []}
+    assigned = asyncio.Event()
+    players_changed = asyncio.Event()
+    streamers_changed = asyncio.Event()
+
+    reader, writer = await asyncio.open_connection(host, port)
+    await send_message(writer, {"type": "hello", "shard": shard, "shards": shards})
+
+    async def read_assignments():
+        while line := await reader.readline():
+            message = codec.loads(line)
+            if message["type"] == "assign":
+                if message["players"] != assignment["players"]:
+                    assignment["players"] = message["players"]
+                    players_changed.set()
+                if message["streamers"] != assignment["streamers"]:
+                    assignment["streamers"] = message["streamers"]
+                    streamers_changed.set()
+                assigned.set()
+
+    reading = asyncio.create_task(read_assignments())
+    await assigned.wait()
+    pollers = [
+        asyncio.create_task(poll_players(riot, assignment, writer, players_changed)),
+        asyncio.create_task(poll_streams(twitch, assignment, writer, streamers_changed)),
+    ]
+    # Un poller mort laisserait son shard muet: le worker s'arrête et WorkerHub le relance
+    done, _ = await asyncio.wait([reading, *pollers], return_when=asyncio.FIRST_COMPLETED)
+    failed = next((task for task in done if task is not reading), None)
+    if failed:
+        print(f"Worker {shard_name(shard)}: poller arrêté ({failed.exception()!r}), arrêt")
+    else:
+        print(f"Worker {shard_name(shard)}: connexion au gateway perdue, arrêt")
+    for task in [reading, *pollers]:
+        task.cancel()
+    await riot.close()
+    if traffic.recorder:
+        traffic.recorder.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Worker de polling Riot/Twitch")
+    parser.add_argument('--shard', type=int, required=True)
+    parser.add_argument('--shards', type=int, required=True)
+    parser.add_argument('--host', default=WORKER_IPC_HOST)
+    parser.add_argument('--port', type=int, default=WORKER_IPC_PORT)
+    args = parser.parse_args()
+    try:
+        sys.exit(asyncio.run(run_worker(args.shard, args.shards, args.host, args.port)))
+    except KeyboardInterrupt:
+        pass